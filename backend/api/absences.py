@@ -2,14 +2,16 @@
 Absence management API endpoints
 """
 
-from fastapi import APIRouter, HTTPException, Header
+from fastapi import APIRouter, HTTPException, Header, Request
 from pydantic import BaseModel
 from typing import Optional, List
 from datetime import datetime
 import uuid
 
 from api.auth import verify_token
-from database import execute_query, execute_insert
+from database import execute_query, execute_insert, execute_many, execute_write
+from cache import cached_json_response, response_cache
+from directory import employee_directory
 
 router = APIRouter()
 
@@ -20,6 +22,31 @@ class AbsenceRequest(BaseModel):
     absence_type: str
     expected_duration: Optional[str] = 'all_meeting'
 
+class BulkAbsenceRequest(BaseModel):
+    absences: List[AbsenceRequest]
+
+ABSENCE_INSERT = """INSERT INTO meeting_absences 
+        (id, meeting_id, employee_id, employee_name, employee_email, department, 
+         reason, absence_type, expected_duration, informed_at) 
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"""
+
+MAX_BULK_ABSENCES = 5000
+
+def _absence_row(absence_id, absence, employee, informed_at):
+    """Build the meeting_absences row, denormalizing the employee's details"""
+    return (
+        absence_id,
+        absence.meeting_id,
+        absence.employee_id,
+        employee['full_name'] if employee else 'Unknown',
+        employee['email'] if employee else '',
+        employee['department'] if employee else '',
+        absence.reason,
+        absence.absence_type,
+        absence.expected_duration,
+        informed_at
+    )
+
 @router.post("/api/absences/notify")
 async def notify_absence(
     absence: AbsenceRequest,
@@ -31,36 +58,16 @@ async def notify_absence(
     # Verify authentication
     user = verify_token(authorization)
     
-    # Get employee details
-    employees = execute_query(
-        "SELECT full_name, email, department FROM employees WHERE id = ?",
-        (absence.employee_id,)
-    )
-    
-    employee_name = employees[0]['full_name'] if employees else 'Unknown'
-    employee_email = employees[0]['email'] if employees else ''
-    department = employees[0]['department'] if employees else ''
+    # Get employee details (served from the in-memory directory)
+    employee = employee_directory.get(absence.employee_id)
     
     # Create absence record
     absence_id = str(uuid.uuid4())
     execute_insert(
-        """INSERT INTO meeting_absences 
-        (id, meeting_id, employee_id, employee_name, employee_email, department, 
-         reason, absence_type, expected_duration, informed_at) 
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-        (
-            absence_id,
-            absence.meeting_id,
-            absence.employee_id,
-            employee_name,
-            employee_email,
-            department,
-            absence.reason,
-            absence.absence_type,
-            absence.expected_duration,
-            datetime.now().isoformat()
-        )
+        ABSENCE_INSERT,
+        _absence_row(absence_id, absence, employee, datetime.now().isoformat())
     )
+    response_cache.invalidate(f"absences:{absence.meeting_id}")
     
     # TODO: Send notification to meeting organizer
     # send_email_notification(meeting_organizer, absence)
@@ -71,12 +78,61 @@ async def notify_absence(
         "message": "Absence notification sent successfully"
     }
 
+@router.post("/api/absences/notify-bulk")
+async def notify_absences_bulk(
+    request: BulkAbsenceRequest,
+    authorization: str = Header(None)
+):
+    """
+    Submit many absence notifications at once (e.g. a whole team out for a holiday)
+    All employees are resolved in one lookup and all absences are inserted in one transaction
+    """
+    # Verify authentication
+    user = verify_token(authorization)
+    
+    if not request.absences:
+        raise HTTPException(status_code=400, detail="absences must not be empty")
+    if len(request.absences) > MAX_BULK_ABSENCES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {MAX_BULK_ABSENCES} absences per request"
+        )
+    
+    employees = employee_directory.get_many(a.employee_id for a in request.absences)
+    informed_at = datetime.now().isoformat()
+    
+    absence_ids = []
+    rows = []
+    for absence in request.absences:
+        absence_id = str(uuid.uuid4())
+        absence_ids.append(absence_id)
+        rows.append(_absence_row(absence_id, absence, employees.get(absence.employee_id), informed_at))
+    
+    execute_many(ABSENCE_INSERT, rows)
+    response_cache.invalidate(*{f"absences:{a.meeting_id}" for a in request.absences})
+    
+    return {
+        "ids": absence_ids,
+        "status": "success",
+        "count": len(absence_ids),
+        "message": f"{len(absence_ids)} absence notifications sent successfully"
+    }
+
 @router.get("/api/absences/meeting/{meeting_id}")
-async def get_meeting_absences(meeting_id: str):
+async def get_meeting_absences(request: Request, meeting_id: str):
     """
     Get all absences for a meeting
     Called by extension when meeting starts
     """
+    return cached_json_response(
+        request,
+        ("absences.meeting", meeting_id),
+        (f"absences:{meeting_id}",),
+        lambda: _build_meeting_absences(meeting_id)
+    )
+
+
+def _build_meeting_absences(meeting_id):
     absences = execute_query(
         """SELECT employee_name, employee_email, department, reason, 
                   absence_type, informed_at, expected_duration 
@@ -114,9 +170,10 @@ async def mark_absences_shown(data: dict):
     if not meeting_id:
         raise HTTPException(status_code=400, detail="meeting_id is required")
     
-    execute_query(
+    execute_write(
         "UPDATE meeting_absences SET shown_in_meeting = 1 WHERE meeting_id = ?",
         (meeting_id,)
     )
+    response_cache.invalidate(f"absences:{meeting_id}")
     
     return {"success": True}
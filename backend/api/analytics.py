@@ -2,30 +2,42 @@
 Analytics API endpoints
 """
 
-from fastapi import APIRouter, HTTPException, Header, Query
+from fastapi import APIRouter, HTTPException, Header, Query, Request
+from fastapi.responses import StreamingResponse
 from datetime import datetime, timedelta
 from typing import Optional
 import json
 
 from api.auth import verify_token
-from database import execute_query, execute_insert
+from database import execute_query, insert_analytics_snapshot, iter_analytics
+from cache import cached_json_response, response_cache
+from ratelimit import analytics_limiter, write_shedder
+import export
+import search
 
 router = APIRouter()
 
 
 @router.get("/api/analytics/meetings")
-async def get_all_meetings():
+async def get_all_meetings(request: Request):
     """
     List all meetings with participant summary (no auth required for local use)
     """
+    return cached_json_response(request, ("analytics.meetings",), ("meetings",), _build_meetings)
+
+
+def _build_meetings():
+    # Summaries come from the partition catalog, so no snapshot partition is opened
     rows = execute_query(
-        """SELECT DISTINCT meeting_id,
-                  MIN(timestamp) as first_seen,
-                  MAX(timestamp) as last_seen,
-                  COUNT(*) as snapshot_count
-           FROM meeting_analytics
-           GROUP BY meeting_id
-           ORDER BY MAX(timestamp) DESC"""
+        """SELECT m.meeting_id,
+                  MIN(m.first_seen) as first_seen,
+                  MAX(m.last_seen) as last_seen,
+                  SUM(m.snapshot_count) as snapshot_count
+           FROM analytics_meeting_periods m
+           JOIN analytics_partitions p ON p.period = m.period
+           WHERE p.state != 'archived'
+           GROUP BY m.meeting_id
+           ORDER BY MAX(last_seen) DESC"""
     )
     meetings = []
     for r in rows:
@@ -39,20 +51,20 @@ async def get_all_meetings():
 
 
 @router.get("/api/analytics/meetings/{meeting_id}")
-async def get_meeting_analytics(meeting_id: str, latest: bool = Query(True, description="If true, return only the latest snapshot")):
+async def get_meeting_analytics(request: Request, meeting_id: str, latest: bool = Query(True, description="If true, return only the latest snapshot")):
     """
     Get analytics for a specific meeting. Returns participants with join times, camera, audio status.
     """
-    if latest:
-        rows = execute_query(
-            "SELECT * FROM meeting_analytics WHERE meeting_id = ? ORDER BY timestamp DESC LIMIT 1",
-            (meeting_id,)
-        )
-    else:
-        rows = execute_query(
-            "SELECT * FROM meeting_analytics WHERE meeting_id = ? ORDER BY timestamp DESC",
-            (meeting_id,)
-        )
+    return cached_json_response(
+        request,
+        ("analytics.meeting", meeting_id, latest),
+        (f"analytics:{meeting_id}",),
+        lambda: _build_meeting_analytics(meeting_id, latest)
+    )
+
+
+def _build_meeting_analytics(meeting_id, latest):
+    rows = list(iter_analytics(meeting_id=meeting_id, limit=1 if latest else None))
 
     if not rows:
         raise HTTPException(status_code=404, detail="Meeting not found")
@@ -71,8 +83,43 @@ async def get_meeting_analytics(meeting_id: str, latest: bool = Query(True, desc
     return {"meetingId": meeting_id, "snapshots": snapshots}
 
 
+@router.get("/api/analytics/export")
+async def export_analytics(
+    table: str = Query('snapshots', description="'snapshots' (one row per participant per snapshot) or 'participants'"),
+    format: str = Query('arrow', description="'arrow' (Arrow IPC stream), 'parquet' or 'csv'"),
+    since: Optional[str] = Query(None, description="X-Export-Watermark from the previous export; omit for full history"),
+    authorization: str = Header(None)
+):
+    """
+    Stream analytics as a columnar file, only rows added after the given watermark.
+    Pass the returned X-Export-Watermark header as `since` on the next call.
+    """
+    # Verify authentication
+    user = verify_token(authorization)
+    
+    if table not in export.TABLES:
+        raise HTTPException(status_code=400, detail=f"table must be one of {', '.join(export.TABLES)}")
+    try:
+        fmt = export.resolve_format(format)
+        since_mark = export.decode_watermark(since)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    until_mark = export.high_water_mark(table)
+    filename = f"{table}_{datetime.now().strftime('%Y%m%dT%H%M%S')}{export.EXTENSIONS[fmt]}"
+    return StreamingResponse(
+        export.stream_export(table, fmt, since_mark, until_mark),
+        media_type=export.MEDIA_TYPES[fmt],
+        headers={
+            "X-Export-Watermark": export.encode_watermark({**since_mark, **until_mark}),
+            "Content-Disposition": f'attachment; filename="{filename}"'
+        }
+    )
+
+
+# Plain def so the blocking write runs in the threadpool and the load shedder sees real concurrency
 @router.post("/api/analytics/upload")
-async def upload_analytics(
+def upload_analytics(
     data: dict,
     authorization: str = Header(None)
 ):
@@ -81,6 +128,7 @@ async def upload_analytics(
     """
     # Verify authentication
     user = verify_token(authorization)
+    analytics_limiter.check(user, data.get('meetingId'))
     
     # Store analytics snapshot
     import uuid
@@ -96,20 +144,27 @@ async def upload_analytics(
     else:
         ts_iso = datetime.now().isoformat()
 
-    execute_insert(
-        "INSERT INTO meeting_analytics (id, meeting_id, timestamp, data) VALUES (?, ?, ?, ?)",
-        (
+    # Index the snapshot's participants for /api/search in the same transaction
+    participants = data.get('participants')
+    attendees = search.attendee_statement(
+        data.get('meetingId'), participants if isinstance(participants, list) else [], ts_iso
+    )
+
+    with write_shedder.admit():
+        insert_analytics_snapshot(
             analytics_id,
             data.get('meetingId'),
             ts_iso,
-            json.dumps(data)
+            json.dumps(data),
+            extra_statements=[attendees] if attendees else ()
         )
-    )
+    response_cache.invalidate("meetings", f"analytics:{data.get('meetingId')}")
     
     return {"success": True}
 
 @router.get("/api/analytics/user/{user_id}")
 async def get_user_analytics(
+    request: Request,
     user_id: str,
     authorization: str = Header(None)
 ):
@@ -119,6 +174,17 @@ async def get_user_analytics(
     # Verify authentication
     user = verify_token(authorization)
     
+    # The 7-day window slides, so keep these entries short-lived
+    return cached_json_response(
+        request,
+        ("analytics.user", user_id),
+        ("participants",),
+        lambda: _build_user_analytics(user_id),
+        ttl=60
+    )
+
+
+def _build_user_analytics(user_id):
     # Get stats from last 7 days
     week_ago = (datetime.now() - timedelta(days=7)).isoformat()
     
@@ -0,0 +1,50 @@
+"""
+Operational metrics endpoints
+"""
+
+from fastapi import APIRouter
+
+import ratelimit
+from cache import response_cache
+from database import get_writer
+from directory import employee_directory
+
+router = APIRouter()
+
+
+@router.get("/api/metrics/cache")
+async def get_cache_metrics():
+    """
+    Response cache hit ratio and memory usage
+    """
+    return response_cache.stats()
+
+
+@router.get("/api/metrics/employee-directory")
+async def get_employee_directory_metrics():
+    """
+    Employee directory cache size and hit ratio
+    """
+    return employee_directory.stats()
+
+
+@router.get("/api/metrics/writer")
+async def get_writer_metrics():
+    """
+    Single-writer coordinator throughput (multi-worker mode only)
+    """
+    writer_client = get_writer()
+    if writer_client is None:
+        return {"mode": "single-process"}
+    return {"mode": "multi-worker", **writer_client.stats()}
+
+
+@router.get("/api/metrics/rate-limits")
+async def get_rate_limit_metrics():
+    """
+    Rate limiter and write load-shedding decisions
+
+    In multi-worker mode limiter counts come from the writer process and
+    cover all workers; load-shedding counts are for this worker.
+    """
+    return ratelimit.stats()
@@ -14,8 +14,12 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent))
 
 from api.auth import verify_token
-from database import execute_query, execute_insert
+from database import execute_insert, execute_query, execute_transaction
 from storage.r2_storage import R2Storage
+from cache import response_cache
+from ratelimit import upload_url_limiter, write_shedder
+import search
+import ledger
 
 router = APIRouter()
 
@@ -54,8 +58,9 @@ class CompleteRecordingRequest(BaseModel):
     participants: List[Participant]
     duration: int
 
+# Plain def so the blocking write runs in the threadpool and the load shedder sees real concurrency
 @router.post("/api/recordings/upload-url", response_model=UploadUrlResponse)
-async def get_upload_url(
+def get_upload_url(
     request: UploadUrlRequest,
     authorization: str = Header(None)
 ):
@@ -64,6 +69,7 @@ async def get_upload_url(
     """
     # Verify authentication
     user = verify_token(authorization)
+    upload_url_limiter.check(user, request.meetingId)
     
     # Generate unique recording ID
     recording_id = f"recording_{request.meetingId}_{int(datetime.now().timestamp())}"
@@ -83,18 +89,20 @@ async def get_upload_url(
         storage_key = f"recordings/{recording_id}.webm"
     
     # Store recording metadata in database
-    execute_insert(
-        "INSERT INTO meeting_recordings (id, meeting_id, storage_key, status) VALUES (?, ?, ?, ?)",
-        (recording_id, request.meetingId, storage_key, 'uploading')
-    )
+    with write_shedder.admit():
+        execute_insert(
+            "INSERT INTO meeting_recordings (id, meeting_id, storage_key, user_id, status) VALUES (?, ?, ?, ?, ?)",
+            (recording_id, request.meetingId, storage_key, user.get('sub'), 'uploading')
+        )
     
     return UploadUrlResponse(
         uploadUrl=upload_url,
         recordingId=recording_id
     )
 
+# Plain def: the object HEAD below is a blocking network call
 @router.post("/api/recordings/complete")
-async def complete_recording(
+def complete_recording(
     request: CompleteRecordingRequest,
     authorization: str = Header(None)
 ):
@@ -105,13 +113,24 @@ async def complete_recording(
     # Verify authentication
     user = verify_token(authorization)
     
-    # Update recording status
-    execute_query(
+    # Update recording status and store participant data in one transaction
+    statements = [(
         "UPDATE meeting_recordings SET status = ?, duration = ?, processed_at = ? WHERE id = ?",
-        ('completed', request.duration, datetime.now().isoformat(), request.recordingId)
-    )
+        ('completed', request.duration, datetime.now().isoformat(), request.recordingId),
+        False
+    )]
+    
+    # Book the uploaded object in the storage ledger
+    ledger_row = _stored_object(request, user)
+    if ledger_row:
+        statements.append((
+            "UPDATE meeting_recordings SET file_size = ?, uploaded_at = COALESCE(uploaded_at, ?) WHERE id = ?",
+            (ledger_row[4], datetime.now().isoformat(), request.recordingId),
+            False
+        ))
+        statements.append(ledger.record_statement([ledger_row]))
     
-    # Store participant data
+    participant_rows = []
     for participant in request.participants:
         participant_id = str(uuid.uuid4())
         
@@ -122,22 +141,39 @@ async def complete_recording(
             if event.get('type') == 'speaking'
         )
         
-        execute_insert(
+        participant_rows.append((
+            participant_id,
+            request.meetingId,
+            participant.name,
+            participant.email,
+            datetime.fromtimestamp(participant.joinTime / 1000).isoformat(),
+            participant.cameraOnDuration,
+            speaking_duration,
+            0.0  # Calculate engagement score later
+        ))
+    
+    if participant_rows:
+        statements.append((
             """INSERT INTO meeting_participants 
             (id, meeting_id, employee_name, employee_email, join_time, 
              camera_on_duration, speaking_duration, engagement_score) 
             VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
-            (
-                participant_id,
-                request.meetingId,
-                participant.name,
-                participant.email,
-                datetime.fromtimestamp(participant.joinTime / 1000).isoformat(),
-                participant.cameraOnDuration,
-                speaking_duration,
-                0.0  # Calculate engagement score later
-            )
-        )
+            participant_rows,
+            True
+        ))
+    
+    # Index participant names/emails for /api/search
+    attendees = search.attendee_statement(
+        request.meetingId,
+        [{'name': p.name, 'email': p.email} for p in request.participants],
+        datetime.fromtimestamp(min(p.joinTime for p in request.participants) / 1000).isoformat()
+        if request.participants else None
+    )
+    if attendees:
+        statements.append(attendees)
+    
+    execute_transaction(statements)
+    response_cache.invalidate("participants")
     
     # TODO: Trigger your existing AI processing pipeline here
     # Example:
@@ -158,3 +194,31 @@ async def complete_recording(
         "message": "Recording processed successfully",
         "taskCount": task_count
     }
+
+
+def _stored_object(request, user):
+    """
+    Ledger row (storage_key, recording_id, meeting_id, user_id, size) for a completed upload
+
+    The size comes from the object itself when R2 is configured, otherwise from
+    the client's metadata; None when neither is known (the periodic bucket
+    reconciliation will pick the object up).
+    """
+    rows = execute_query(
+        "SELECT COALESCE(storage_key, s3_key) AS storage_key, user_id FROM meeting_recordings WHERE id = ?",
+        (request.recordingId,)
+    )
+    if not rows or not rows[0]['storage_key']:
+        return None
+    storage_key = rows[0]['storage_key']
+    
+    size = None
+    if r2_storage:
+        metadata = r2_storage.get_recording_metadata(storage_key)
+        size = metadata['size'] if metadata else None
+    if size is None:
+        size = request.metadata.get('fileSize') or request.metadata.get('size')
+    if not isinstance(size, int) or size < 0:
+        return None
+    
+    return (storage_key, request.recordingId, request.meetingId, rows[0]['user_id'] or user.get('sub'), size)
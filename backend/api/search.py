@@ -0,0 +1,47 @@
+"""
+Search API endpoints
+"""
+
+from fastapi import APIRouter, HTTPException, Header, Query
+from typing import Optional
+
+from api.auth import verify_token
+import search
+
+router = APIRouter()
+
+
+@router.get("/api/search")
+def search_all(
+    q: str = Query(..., min_length=1, description="Words to search for; the last word also matches as a prefix"),
+    type: str = Query('all', description="'absences', 'participants' or 'all'"),
+    since: Optional[str] = Query(None, description="Inclusive lower bound (ISO date/time)"),
+    until: Optional[str] = Query(None, description="Exclusive upper bound (ISO date/time)"),
+    meeting_id: Optional[str] = Query(None, description="Restrict to one meeting"),
+    sort: str = Query('relevance', description="'relevance' (best match first) or 'recent' (newest first, fastest for common words)"),
+    limit: int = Query(20, ge=1, le=search.MAX_LIMIT),
+    offset: int = Query(0, ge=0),
+    authorization: str = Header(None)
+):
+    """
+    Ranked full-text search over absence reasons/types and participant names/emails.
+    Absences are filtered on informed_at; participants on when they were seen in the meeting.
+    """
+    # Verify authentication
+    user = verify_token(authorization)
+    
+    types = search.SEARCH_TYPES if type == 'all' else (type,)
+    if any(t not in search.SEARCH_TYPES for t in types):
+        raise HTTPException(status_code=400, detail="type must be 'absences', 'participants' or 'all'")
+    
+    searches = {'absences': search.search_absences, 'participants': search.search_participants}
+    try:
+        results = {
+            t: searches[t](q, since=since, until=until, meeting_id=meeting_id,
+                            limit=limit, offset=offset, sort=sort)
+            for t in types
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return {"query": q, "sort": sort, "limit": limit, "offset": offset, **results}
@@ -0,0 +1,44 @@
+"""
+Storage usage API endpoints
+"""
+
+from fastapi import APIRouter, HTTPException, Header, Query
+from typing import Optional
+
+from api.auth import verify_token
+import ledger
+
+router = APIRouter()
+
+
+@router.get("/api/storage/usage")
+def get_storage_usage(
+    scope: str = Query('total', description="'total', 'meeting' or 'user'"),
+    id: Optional[str] = Query(None, description="Meeting or user ID; defaults to the caller for scope=user"),
+    days: int = Query(30, ge=1, le=366, description="Days of growth history"),
+    authorization: str = Header(None)
+):
+    """
+    Recording storage used by the whole bucket, one meeting or one user, from the storage ledger,
+    plus its day-by-day growth. Reads are a primary-key lookup; nothing is listed from R2.
+    """
+    # Verify authentication
+    user = verify_token(authorization)
+    
+    if scope == 'user' and not id:
+        id = user.get('sub')
+    if scope == 'meeting' and not id:
+        raise HTTPException(status_code=400, detail="id is required for scope=meeting")
+    
+    try:
+        current = ledger.usage(scope, id or '')
+        history = ledger.growth(scope, id or '', days)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return {
+        "scope": scope,
+        "id": id if scope != 'total' else None,
+        **current,
+        "growth": history
+    }
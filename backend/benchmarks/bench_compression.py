@@ -0,0 +1,76 @@
+"""
+Benchmark for HTTP compression of analytics payloads
+
+For a snapshot upload and a full get_meeting_analytics?latest=false response,
+prints bytes on the wire and CPU time to encode and decode with every
+encoding the server supports (zstd and br need `pip install zstandard brotli`).
+
+Usage:
+    python benchmarks/bench_compression.py --participants 25 --snapshots 120
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import compression
+
+from bench_workers import snapshot
+
+
+def cpu_per_call(fn, arg, min_seconds=0.5):
+    """CPU seconds per call, repeated until min_seconds of CPU have been spent"""
+    calls = 0
+    started = time.process_time()
+    while True:
+        fn(arg)
+        calls += 1
+        elapsed = time.process_time() - started
+        if elapsed >= min_seconds:
+            return elapsed / calls
+
+
+def report(label, body):
+    print(f"\n{label}: {len(body):,} bytes uncompressed")
+    print(f"{'encoding':>9} {'bytes':>10} {'ratio':>7} {'encode us':>10} {'decode us':>10}")
+    print(f"{'identity':>9} {len(body):>10,} {1:>6.1f}x {'-':>10} {'-':>10}")
+    for encoding in compression.ENCODINGS:
+        encoded = compression.compress(body, encoding)
+        assert compression.decompress(encoded, encoding, limit=len(body)) == body
+        encode = cpu_per_call(lambda b: compression.compress(b, encoding), body)
+        decode = cpu_per_call(lambda b: compression.decompress(b, encoding, limit=len(body)), encoded)
+        print(f"{encoding:>9} {len(encoded):>10,} {len(body) / len(encoded):>6.1f}x "
+              f"{encode * 1e6:>10.0f} {decode * 1e6:>10.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--participants', type=int, default=25)
+    parser.add_argument('--snapshots', type=int, default=120, help="Snapshots in the meeting response (1 hour at 30 s)")
+    args = parser.parse_args()
+
+    print(f"Encodings available: {', '.join(compression.ENCODINGS)}")
+    upload = json.dumps(snapshot('bench-meeting', args.participants)).encode('utf-8')
+    report("Snapshot upload (request body)", upload)
+
+    # Same shape as get_meeting_analytics?latest=false, serialized like cached_json_response
+    meeting = {
+        "meetingId": "bench-meeting",
+        "snapshots": [
+            {"id": f"snap-{i}", "meetingId": "bench-meeting", "timestamp": f"2026-01-09T11:{i // 2 % 60:02d}:00",
+             "participantCount": args.participants,
+             "participants": snapshot('bench-meeting', args.participants)["participants"]}
+            for i in range(args.snapshots)
+        ]
+    }
+    response = json.dumps(meeting, separators=(',', ':')).encode('utf-8')
+    report(f"Meeting analytics response ({args.snapshots} snapshots)", response)
+
+
+if __name__ == "__main__":
+    main()
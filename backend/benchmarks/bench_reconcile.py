@@ -0,0 +1,87 @@
+"""
+Benchmark for the stuck-upload reconciliation job
+
+Seeds a scratch database with stale 'uploading' recordings and reconciles
+them against either an in-memory object store with simulated HEAD latency
+or a real S3-compatible endpoint (MinIO, moto server, ...).
+
+Usage:
+    python benchmarks/bench_reconcile.py --rows 20000 --latency-ms 30 --workers 1 8 32 64
+    python benchmarks/bench_reconcile.py --rows 2000 --endpoint http://localhost:9000 --bucket test
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+os.environ.setdefault('LANEWAY_DB_PATH', os.path.join(tempfile.mkdtemp(prefix='laneway-bench-'), 'laneway.db'))
+
+import database
+from reconcile import reconcile_stuck_uploads
+
+
+class InMemoryStorage:
+    """Stand-in for R2Storage: a dict of objects and a fixed per-HEAD delay"""
+
+    def __init__(self, objects, latency):
+        self.objects = objects
+        self.latency = latency
+
+    def get_recording_metadata(self, key, raise_errors=False):
+        time.sleep(self.latency)
+        return self.objects.get(key)
+
+
+def seed(rows, present_ratio):
+    created = (datetime.now(timezone.utc) - timedelta(days=2)).strftime('%Y-%m-%d %H:%M:%S')
+    database.execute_write("DELETE FROM meeting_recordings")
+    records = [
+        (f"recording_bench_{i:06d}", "bench-meeting", f"recordings/recording_bench_{i:06d}.webm", 'uploading', created)
+        for i in range(rows)
+    ]
+    database.execute_many(
+        "INSERT INTO meeting_recordings (id, meeting_id, storage_key, status, created_at) VALUES (?, ?, ?, ?, ?)",
+        records
+    )
+    present = int(rows * present_ratio)
+    return {
+        key: {'size': 1024 * 1024, 'last_modified': datetime.now(timezone.utc).isoformat(), 'content_type': 'video/webm'}
+        for _, _, key, _, _ in records[:present]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--present-ratio', type=float, default=0.7, help="Fraction of rows whose object exists")
+    parser.add_argument('--latency-ms', type=float, default=30, help="Simulated HEAD latency (in-memory store)")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 8, 32, 64])
+    parser.add_argument('--page-size', type=int, default=500)
+    parser.add_argument('--endpoint', help="Use a real S3-compatible endpoint instead of the in-memory store")
+    parser.add_argument('--bucket', default='laneway-recordings')
+    args = parser.parse_args()
+
+    database.init_database()
+    print(f"{'workers':>8} {'rows':>8} {'seconds':>9} {'rows/s':>10} {'uploaded':>9} {'failed':>7}")
+    for workers in args.workers:
+        objects = seed(args.rows, args.present_ratio)
+        if args.endpoint:
+            from storage.r2_storage import R2Storage
+            storage = R2Storage(endpoint_url=args.endpoint, bucket_name=args.bucket, max_pool_connections=workers)
+            for key in objects:
+                storage.client.put_object(Bucket=args.bucket, Key=key, Body=b'x')
+        else:
+            storage = InMemoryStorage(objects, args.latency_ms / 1000)
+        summary = reconcile_stuck_uploads(storage, page_size=args.page_size, max_workers=workers)
+        rate = summary['scanned'] / summary['seconds'] if summary['seconds'] else float('inf')
+        print(f"{workers:>8} {summary['scanned']:>8} {summary['seconds']:>9.2f} {rate:>10.0f} "
+              f"{summary['uploaded']:>9} {summary['failed']:>7}")
+
+
+if __name__ == "__main__":
+    main()
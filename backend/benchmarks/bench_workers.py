@@ -0,0 +1,152 @@
+"""
+Throughput benchmark for multi-worker serving
+
+Starts the API via start.py with 1, 2, 4... workers against a scratch database,
+drives it with a mix of analytics reads and snapshot uploads from several
+client processes, and prints requests/second for each worker count.
+
+Usage:
+    python benchmarks/bench_workers.py --workers 1 2 4 --duration 10
+"""
+
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+AUTH = {"Authorization": "Bearer local-mode", "Content-Type": "application/json"}
+
+
+def snapshot(meeting_id, participants=25):
+    return {
+        "meetingId": meeting_id,
+        "timestamp": int(time.time() * 1000),
+        "participantCount": participants,
+        "participants": [
+            {
+                "id": f"p{i}",
+                "name": f"Participant {i}",
+                "joinTime": "2026-01-09T11:45:32.603+05:30",
+                "cameraOn": i % 2 == 0,
+                "audioMuted": i % 3 == 0,
+                "cameraOnDuration": i * 30,
+                "speakingEvents": [{"start": 0, "end": 5000, "duration": 5}] * 5
+            }
+            for i in range(participants)
+        ]
+    }
+
+
+def client_loop(port, duration, write_ratio, meetings, results):
+    """One client process: sequential keep-alive requests until the deadline"""
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    rng = random.Random(os.getpid())
+    done = errors = 0
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        meeting_id = f"bench-{rng.randrange(meetings)}"
+        try:
+            if rng.random() < write_ratio:
+                conn.request('POST', '/api/analytics/upload', json.dumps(snapshot(meeting_id)), AUTH)
+            else:
+                conn.request('GET', f'/api/analytics/meetings/{meeting_id}?latest=false')
+            response = conn.getresponse()
+            response.read()
+            if response.status >= 400:
+                errors += 1
+            done += 1
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            conn.close()
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    results.put((done, errors))
+
+
+def wait_until_up(port, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', '/health')
+            if conn.getresponse().status == 200:
+                return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+
+def run(workers, args, port):
+    scratch = tempfile.mkdtemp(prefix='laneway-bench-')
+    env = dict(
+        os.environ,
+        LANEWAY_DB_PATH=os.path.join(scratch, 'laneway.db'),
+        RESPONSE_CACHE_TTL='0' if args.no_cache else os.getenv('RESPONSE_CACHE_TTL', '30')
+    )
+    server = subprocess.Popen(
+        [sys.executable, 'start.py', '--workers', str(workers), '--port', str(port)],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        if not wait_until_up(port):
+            raise RuntimeError(f"Server with {workers} workers did not start")
+
+        # Seed every meeting with a few snapshots so reads have work to do
+        conn = http.client.HTTPConnection('127.0.0.1', port)
+        for m in range(args.meetings):
+            for _ in range(args.seed_snapshots):
+                conn.request('POST', '/api/analytics/upload', json.dumps(snapshot(f"bench-{m}")), AUTH)
+                conn.getresponse().read()
+
+        results = multiprocessing.Queue()
+        clients = [
+            multiprocessing.Process(
+                target=client_loop,
+                args=(port, args.duration, args.write_ratio, args.meetings, results)
+            )
+            for _ in range(args.clients)
+        ]
+        started = time.monotonic()
+        for c in clients:
+            c.start()
+        totals = [results.get() for _ in clients]
+        for c in clients:
+            c.join()
+        elapsed = time.monotonic() - started
+
+        done = sum(t[0] for t in totals)
+        errors = sum(t[1] for t in totals)
+        return done / elapsed, errors
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--clients', type=int, default=max(4, os.cpu_count() or 4))
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--write-ratio', type=float, default=0.1)
+    parser.add_argument('--meetings', type=int, default=50)
+    parser.add_argument('--seed-snapshots', type=int, default=5)
+    parser.add_argument('--port', type=int, default=5099)
+    parser.add_argument('--no-cache', action='store_true', help="Disable the response cache to measure raw query throughput")
+    args = parser.parse_args()
+
+    print(f"{'workers':>8} {'req/s':>10} {'speedup':>8} {'errors':>7}")
+    baseline = None
+    for workers in args.workers:
+        rate, errors = run(workers, args, args.port)
+        baseline = baseline or rate
+        print(f"{workers:>8} {rate:>10.1f} {rate / baseline:>7.2f}x {errors:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+"""
+In-process response cache
+TTL + LRU cache for read-heavy GET endpoints, with tag-based invalidation and strong ETags
+"""
+
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from fastapi import Request, Response
+
+# Defaults can be overridden from the environment
+DEFAULT_TTL = float(os.getenv('RESPONSE_CACHE_TTL', '30'))
+DEFAULT_MAX_ENTRIES = int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', '1024'))
+DEFAULT_MAX_BYTES = int(os.getenv('RESPONSE_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+# In multi-worker mode, how often (seconds) to pull invalidations made by other workers
+DEFAULT_PEER_SYNC_INTERVAL = float(os.getenv('RESPONSE_CACHE_PEER_SYNC', '0.25'))
+
+
+class CacheEntry:
+    """A serialized response body plus its validator"""
+
+    __slots__ = ('key', 'body', 'etag', 'tags', 'expires_at', 'size')
+
+    def __init__(self, key, body, tags, expires_at):
+        self.key = key
+        self.body = body
+        self.etag = make_etag(body)
+        self.tags = frozenset(tags)
+        self.expires_at = expires_at
+        self.size = len(body) + sys.getsizeof(key)
+
+
+class ResponseCache:
+    """Thread-safe TTL + LRU cache of JSON response bodies"""
+
+    def __init__(self, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._tags = {}
+        self._lock = threading.Lock()
+        self._bytes = 0
+        # Bumped on every invalidation so a body built before a write is never stored after it
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        # Optional channel to the other workers (see writer.WriterClient)
+        self._peer = None
+        self._peer_seq = 0
+        self._peer_interval = DEFAULT_PEER_SYNC_INTERVAL
+        self._peer_synced_at = 0.0
+        self._peer_lock = threading.Lock()
+
+    @property
+    def generation(self):
+        return self._generation
+
+    def enable_peer_sync(self, peer, interval=DEFAULT_PEER_SYNC_INTERVAL):
+        """
+        Share invalidations with other worker processes
+
+        Args:
+            peer: Object with publish_invalidation(tags) and poll_invalidations(since)
+            interval: Minimum seconds between polls; bounds cross-worker staleness
+        """
+        self._peer_seq, _ = peer.poll_invalidations(0)
+        self._peer_interval = interval
+        self._peer = peer
+
+    def get(self, key):
+        """Return a live entry for key, or None"""
+        if self._peer is not None:
+            self._sync_peers()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry.expires_at <= time.monotonic():
+                self._remove(entry)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, body, tags=(), ttl=None, generation=None):
+        """
+        Store a serialized body under key
+
+        Args:
+            key: Hashable cache key (route name + params)
+            body: Serialized response body (bytes)
+            tags: Invalidation tags the entry depends on
+            ttl: Optional per-entry TTL in seconds
+            generation: Cache generation observed before the body was built;
+                the entry is dropped if anything was invalidated since
+
+        Returns:
+            CacheEntry: The new entry (returned even when not stored)
+        """
+        entry = CacheEntry(key, body, tags, time.monotonic() + (self.ttl if ttl is None else ttl))
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return entry
+            if entry.size > self.max_bytes:
+                return entry
+            old = self._entries.get(key)
+            if old is not None:
+                self._remove(old)
+            self._entries[key] = entry
+            self._bytes += entry.size
+            for tag in entry.tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, oldest = next(iter(self._entries.items()))
+                self._remove(oldest)
+                self.evictions += 1
+        return entry
+
+    def invalidate(self, *tags):
+        """Drop every entry carrying any of the given tags (in every worker)"""
+        self._invalidate_local(tags)
+        if self._peer is not None:
+            try:
+                self._peer.publish_invalidation(tags)
+            except Exception as e:
+                print(f"⚠️  Cache invalidation broadcast failed: {e}")
+
+    def _invalidate_local(self, tags):
+        with self._lock:
+            self._generation += 1
+            for tag in tags:
+                for key in self._tags.pop(tag, ()):
+                    entry = self._entries.get(key)
+                    if entry is not None:
+                        self._remove(entry)
+                        self.invalidations += 1
+
+    def record_not_modified(self):
+        """Count a request answered with 304"""
+        with self._lock:
+            self.not_modified += 1
+
+    def clear(self):
+        """Drop all entries"""
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._tags.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """Hit ratio and memory usage"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "maxEntries": self.max_entries,
+                "memoryBytes": self._bytes,
+                "maxBytes": self.max_bytes,
+                "ttlSeconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hitRatio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "notModified": self.not_modified,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations
+            }
+
+    def _sync_peers(self):
+        """Apply invalidations published by other workers since the last poll"""
+        now = time.monotonic()
+        if now - self._peer_synced_at < self._peer_interval:
+            return
+        if not self._peer_lock.acquire(blocking=False):
+            return
+        try:
+            self._peer_synced_at = now
+            seq, tags = self._peer.poll_invalidations(self._peer_seq)
+            if tags is None:
+                # Fell behind the shared log; nothing cached can be trusted
+                self.clear()
+            elif tags:
+                self._invalidate_local(tags)
+            self._peer_seq = seq
+        except Exception as e:
+            print(f"⚠️  Cache invalidation sync failed: {e}")
+            self.clear()
+        finally:
+            self._peer_lock.release()
+
+    def _remove(self, entry):
+        """Unlink an entry; caller must hold the lock"""
+        del self._entries[entry.key]
+        self._bytes -= entry.size
+        for tag in entry.tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(entry.key)
+                if not keys:
+                    del self._tags[tag]
+
+
+def make_etag(body):
+    """Strong ETag derived from the exact response bytes"""
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match, etag):
+    """Weak comparison of an If-None-Match header against an ETag (RFC 9110 13.1.2)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+# Shared cache instance used by the API routers
+response_cache = ResponseCache()
+
+
+def cached_json_response(request: Request, key, tags, build, ttl=None, cache=None):
+    """
+    Serve a JSON payload through the response cache
+
+    On a hit the body is served without calling build; if the client's
+    If-None-Match matches, a bodiless 304 is returned instead.
+
+    Args:
+        request: Incoming request (for If-None-Match)
+        key: Cache key, e.g. ("analytics.meeting", meeting_id, latest)
+        tags: Invalidation tags the payload depends on
+        build: Zero-argument callable returning the JSON payload; exceptions
+            (e.g. HTTPException for 404) propagate and nothing is cached
+        ttl: Optional per-entry TTL in seconds
+
+    Returns:
+        Response: 200 with body and ETag, or 304
+    """
+    cache = cache or response_cache
+    entry = cache.get(key)
+    if entry is None:
+        generation = cache.generation
+        payload = build()
+        body = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+        entry = cache.put(key, body, tags, ttl=ttl, generation=generation)
+
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get('if-none-match'), entry.etag):
+        cache.record_not_modified()
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
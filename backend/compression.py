@@ -0,0 +1,385 @@
+"""
+HTTP compression middleware
+Decodes gzip / br / zstd request bodies (with a cap on the decompressed size,
+so a small upload can't expand into gigabytes) and compresses responses above
+a size threshold using the best encoding the client accepts. Responses are
+compressed chunk by chunk, so streaming endpoints stay streaming.
+
+Brotli and Zstandard are optional (`pip install brotli zstandard`); without
+them only gzip is offered and accepted.
+"""
+
+import io
+import json
+import os
+import re
+import zlib
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+MINIMUM_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', '1024'))
+MAX_REQUEST_BYTES = int(os.getenv('REQUEST_MAX_DECOMPRESSED_BYTES', str(10 * 1024 * 1024)))
+GZIP_LEVEL = int(os.getenv('COMPRESSION_GZIP_LEVEL', '6'))
+BROTLI_QUALITY = int(os.getenv('COMPRESSION_BROTLI_QUALITY', '4'))
+ZSTD_LEVEL = int(os.getenv('COMPRESSION_ZSTD_LEVEL', '3'))
+
+# Server preference when the client accepts several with the same q-value
+ENCODINGS = tuple(
+    name for name, available in (('zstd', zstandard), ('br', brotli), ('gzip', zlib)) if available
+)
+
+COMPRESSIBLE_TYPES = re.compile(
+    r'^(text/|application/(json|javascript|xml|csv|x-ndjson|vnd\.apache\.arrow\.stream)|[^;]*\+(json|xml))'
+)
+
+# Suffix added inside ETags of encoded responses: "abc" -> "abc-gzip"
+ETAG_SUFFIX = re.compile(r'-(gzip|br|zstd)"')
+
+
+class DecodeError(Exception):
+    """Request body is corrupt or exceeds the decompressed size limit"""
+
+    def __init__(self, status, detail):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+
+
+# ---------------------------------------------------------------------------
+# Negotiation
+# ---------------------------------------------------------------------------
+
+def parse_accept_encoding(header):
+    """Map of encoding -> q-value from an Accept-Encoding header"""
+    accepted = {}
+    for part in (header or '').split(','):
+        name, _, params = part.strip().partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        match = re.search(r'q\s*=\s*([0-9.]+)', params)
+        if match:
+            try:
+                q = float(match.group(1))
+            except ValueError:
+                q = 0.0
+        accepted[name] = q
+    return accepted
+
+
+def choose_encoding(header):
+    """Best available encoding for an Accept-Encoding header, or None for identity"""
+    accepted = parse_accept_encoding(header)
+    wildcard = accepted.get('*', 0.0)
+    best, best_q = None, 0.0
+    for name in ENCODINGS:
+        q = accepted.get(name, wildcard)
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+
+# ---------------------------------------------------------------------------
+# Codecs
+# ---------------------------------------------------------------------------
+
+class _Compressor:
+    """Incremental compressor; flush() makes everything written so far decodable"""
+
+    def __init__(self, encoding):
+        self.encoding = encoding
+        if encoding == 'gzip':
+            self._obj = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        elif encoding == 'br':
+            self._obj = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            self._obj = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+
+    def compress(self, data, flush):
+        if self.encoding == 'gzip':
+            out = self._obj.compress(data)
+            return out + self._obj.flush(zlib.Z_SYNC_FLUSH) if flush else out
+        if self.encoding == 'br':
+            out = self._obj.process(data)
+            return out + self._obj.flush() if flush else out
+        out = self._obj.compress(data)
+        return out + self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK) if flush else out
+
+    def finish(self, data=b''):
+        if self.encoding == 'gzip':
+            return self._obj.compress(data) + self._obj.flush()
+        if self.encoding == 'br':
+            return self._obj.process(data) + self._obj.finish()
+        return self._obj.compress(data) + self._obj.flush()
+
+
+def compress(data, encoding):
+    """Compress a whole body"""
+    return _Compressor(encoding).finish(data)
+
+
+def decompress(data, encoding, limit=MAX_REQUEST_BYTES):
+    """
+    Decompress a request body, refusing to produce more than limit bytes
+
+    Raises:
+        DecodeError: 413 when the output would exceed limit, 400 when corrupt,
+            415 for encodings this server doesn't support
+    """
+    try:
+        if encoding in ('gzip', 'x-gzip'):
+            return _bounded_zlib(data, 16 + zlib.MAX_WBITS, limit)
+        if encoding == 'deflate':
+            return _bounded_zlib(data, zlib.MAX_WBITS, limit)
+        if encoding == 'br' and brotli is not None:
+            return _bounded_brotli(data, limit)
+        if encoding == 'zstd' and zstandard is not None:
+            reader = zstandard.ZstdDecompressor().stream_reader(io.BytesIO(data), read_across_frames=True)
+            out = reader.read(limit + 1)
+            if len(out) > limit:
+                raise DecodeError(413, "Decompressed request body too large")
+            return out
+    except DecodeError:
+        raise
+    except Exception:
+        raise DecodeError(400, f"Request body is not valid {encoding} data")
+    raise DecodeError(415, f"Unsupported Content-Encoding: {encoding}")
+
+
+def _bounded_zlib(data, wbits, limit):
+    decoder = zlib.decompressobj(wbits)
+    parts, size = [], 0
+    pending = data
+    while pending:
+        out = decoder.decompress(pending, limit + 1 - size)
+        size += len(out)
+        parts.append(out)
+        if size > limit:
+            raise DecodeError(413, "Decompressed request body too large")
+        pending = decoder.unconsumed_tail
+        if decoder.eof:
+            break
+    if not decoder.eof:
+        raise DecodeError(400, "Request body is truncated")
+    return b''.join(parts)
+
+
+def _bounded_brotli(data, limit):
+    # Fed in small slices so a single call can't expand far past the limit
+    decoder = brotli.Decompressor()
+    parts, size = [], 0
+    for start in range(0, len(data), 1024):
+        out = decoder.process(data[start:start + 1024])
+        size += len(out)
+        parts.append(out)
+        if size > limit:
+            raise DecodeError(413, "Decompressed request body too large")
+    if not decoder.is_finished():
+        raise DecodeError(400, "Request body is truncated")
+    return b''.join(parts)
+
+
+# ---------------------------------------------------------------------------
+# Middleware
+# ---------------------------------------------------------------------------
+
+def _header(headers, name):
+    for key, value in headers:
+        if key == name:
+            return value.decode('latin-1')
+    return None
+
+
+def _without(headers, *names):
+    return [(k, v) for k, v in headers if k not in names]
+
+
+async def _send_error(send, status, detail):
+    body = json.dumps({"detail": detail}).encode('utf-8')
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class CompressionMiddleware:
+    """Pure ASGI middleware: request body decoding plus negotiated response compression"""
+
+    def __init__(self, app, minimum_size=MINIMUM_SIZE, max_request_bytes=MAX_REQUEST_BYTES):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.max_request_bytes = max_request_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = scope["headers"]
+        content_encoding = (_header(headers, b"content-encoding") or '').strip().lower()
+        if content_encoding and content_encoding != 'identity':
+            try:
+                body = await self._read_body(receive)
+                body = decompress(body, content_encoding, self.max_request_bytes)
+            except DecodeError as e:
+                await _send_error(send, e.status, e.detail)
+                return
+            headers = _without(headers, b"content-encoding", b"content-length")
+            headers.append((b"content-length", str(len(body)).encode()))
+            receive = _replay(body)
+
+        # ETags of encoded responses carry a suffix; the app only knows the plain ones
+        if_none_match = _header(headers, b"if-none-match")
+        etag_suffix = None
+        if if_none_match and ETAG_SUFFIX.search(if_none_match):
+            etag_suffix = ETAG_SUFFIX.search(if_none_match).group(1)
+            headers = _without(headers, b"if-none-match")
+            headers.append((b"if-none-match", ETAG_SUFFIX.sub('"', if_none_match).encode('latin-1')))
+
+        if headers is not scope["headers"]:
+            scope = dict(scope, headers=headers)
+
+        encoding = choose_encoding(_header(headers, b"accept-encoding"))
+        responder = _CompressingSender(send, encoding, self.minimum_size, etag_suffix)
+        await self.app(scope, receive, responder.send)
+
+    async def _read_body(self, receive):
+        # The compressed body itself is held to the same limit
+        parts, size = [], 0
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                raise DecodeError(400, "Client disconnected")
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            if size > self.max_request_bytes:
+                raise DecodeError(413, "Request body too large")
+            parts.append(chunk)
+            if not message.get("more_body", False):
+                return b''.join(parts)
+
+
+def _replay(body):
+    sent = False
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        return {"type": "http.disconnect"}
+
+    return receive
+
+
+class _CompressingSender:
+    """
+    Wraps send: holds the response start until enough body has been seen to
+    decide, then either passes everything through or compresses it
+    """
+
+    def __init__(self, send, encoding, minimum_size, etag_suffix):
+        self._send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.etag_suffix = etag_suffix
+        self._start = None
+        self._buffer = []
+        self._buffered = 0
+        self._compressor = None
+        self._passthrough = False
+
+    async def send(self, message):
+        kind = message["type"]
+        if kind == "http.response.start":
+            self._start = message
+            headers = message.get("headers", [])
+            status = message["status"]
+            eligible = self._eligible(status, headers)
+            if eligible:
+                message["headers"] = self._vary(headers)
+            if status == 304 and self.etag_suffix:
+                # The client validated an encoded representation; answer with the same ETag
+                message["headers"] = self._tag_etag(message["headers"], self.etag_suffix)
+            if not eligible or self.encoding is None:
+                self._passthrough = True
+                await self._send(message)
+            return
+
+        if kind != "http.response.body" or self._passthrough:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self._compressor is not None:
+            data = self._compressor.compress(body, flush=True) if more_body else self._compressor.finish(body)
+            if data or not more_body:
+                await self._send({"type": "http.response.body", "body": data, "more_body": more_body})
+            return
+
+        self._buffer.append(body)
+        self._buffered += len(body)
+        if more_body and self._buffered < self.minimum_size:
+            return
+
+        pending = b''.join(self._buffer)
+        self._buffer = []
+        headers = self._start["headers"]
+        if self._buffered < self.minimum_size:
+            # Whole response is small: send it as is
+            self._passthrough = True
+            await self._send(self._start)
+            await self._send({"type": "http.response.body", "body": pending, "more_body": False})
+            return
+
+        headers = _without(headers, b"content-length")
+        headers.append((b"content-encoding", self.encoding.encode()))
+        headers = self._tag_etag(headers, self.encoding)
+        self._compressor = _Compressor(self.encoding)
+        if more_body:
+            data = self._compressor.compress(pending, flush=True)
+        else:
+            data = self._compressor.finish(pending)
+            headers.append((b"content-length", str(len(data)).encode()))
+        self._start["headers"] = headers
+        await self._send(self._start)
+        await self._send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+    @staticmethod
+    def _eligible(status, headers):
+        if status < 200 or status in (204, 206, 304):
+            return False
+        if _header(headers, b"content-encoding"):
+            return False
+        if 'no-transform' in (_header(headers, b"cache-control") or ''):
+            return False
+        content_type = _header(headers, b"content-type") or ''
+        return bool(COMPRESSIBLE_TYPES.match(content_type))
+
+    @staticmethod
+    def _vary(headers):
+        vary = _header(headers, b"vary")
+        if vary and 'accept-encoding' in vary.lower():
+            return headers
+        value = f"{vary}, Accept-Encoding" if vary else "Accept-Encoding"
+        return _without(headers, b"vary") + [(b"vary", value.encode('latin-1'))]
+
+    @staticmethod
+    def _tag_etag(headers, suffix):
+        etag = _header(headers, b"etag")
+        if not etag or not etag.endswith('"'):
+            return headers
+        return _without(headers, b"etag") + [(b"etag", f'{etag[:-1]}-{suffix}"'.encode('latin-1'))]
@@ -4,10 +4,20 @@ Database connection and utilities
 
 import sqlite3
 import os
+import re
+import shutil
+import stat
 from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+import writer
 
 # Database file path
-DB_PATH = os.path.join(os.path.dirname(__file__), 'database', 'laneway.db')
+DB_PATH = os.getenv('LANEWAY_DB_PATH') or os.path.join(os.path.dirname(__file__), 'database', 'laneway.db')
+
+# Set when running behind the single-writer coordinator (see start.py --workers)
+_writer_client = None
 
 def init_database():
     """Initialize the database with schema"""
@@ -22,13 +32,27 @@ def init_database():
         
         # Execute schema
         conn = sqlite3.connect(DB_PATH)
+        # WAL lets readers in other processes proceed while the writer commits
+        conn.execute("PRAGMA journal_mode=WAL")
         conn.executescript(schema)
+        # Columns added after a table was first created (CREATE TABLE IF NOT EXISTS won't add them)
+        ensure_column(conn, 'meeting_recordings', 'user_id', 'TEXT')
         conn.commit()
         conn.close()
         print(f"✅ Database initialized at {DB_PATH}")
+        
+        migrated = migrate_legacy_analytics()
+        if migrated:
+            print(f"✅ Moved {migrated} analytics snapshots into monthly partitions")
     else:
         print(f"⚠️  Schema file not found at {schema_path}")
 
+def ensure_column(conn, table, column, declaration):
+    """Add a column to an existing table if it is missing"""
+    columns = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+    if column not in columns:
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {declaration}")
+
 @contextmanager
 def get_db():
     """Get database connection context manager"""
@@ -53,9 +77,488 @@ def execute_query(query, params=None):
             cursor.execute(query)
         return cursor.fetchall()
 
+def get_writer():
+    """Return the writer-process client, or None when writes run in-process"""
+    global _writer_client
+    if _writer_client is None:
+        _writer_client = writer.client_from_env()
+    return _writer_client
+
+def execute_transaction(statements, attach=None):
+    """
+    Run write statements atomically
+
+    In multi-worker mode the statements are shipped to the writer process,
+    otherwise they run on a local connection.
+
+    Args:
+        statements: List of (query, params, many) tuples
+        attach: Optional {alias: path} of database files the statements use
+
+    Returns:
+        list: (lastrowid, rowcount) per statement
+    """
+    client = get_writer()
+    if client is not None:
+        return client.execute(statements, attach)
+    with get_db() as conn:
+        for alias, path in (attach or {}).items():
+            conn.execute(f"ATTACH DATABASE ? AS {alias}", (path,))
+        return writer.run_statements(conn, statements)
+
+def execute_write(query, params=None):
+    """Execute an UPDATE/DELETE and return the affected row count"""
+    return execute_transaction([(query, params, False)])[0][1]
+
 def execute_insert(query, params):
     """Execute an insert query and return last row id"""
-    with get_db() as conn:
-        cursor = conn.cursor()
-        cursor.execute(query, params)
-        return cursor.lastrowid
+    return execute_transaction([(query, params, False)])[0][0]
+
+def execute_many(query, params_list):
+    """Execute a query once per parameter set in a single transaction"""
+    return execute_transaction([(query, params_list, True)])[0][1]
+
+
+# ---------------------------------------------------------------------------
+# Monthly partitions for meeting_analytics
+#
+# Each calendar month of snapshots lives in its own database file
+# (partitions/analytics_YYYY_MM.db). The main database keeps a catalog of
+# partitions and of which months each meeting appears in, so reads open only
+# the partitions they need. Past months can be sealed (VACUUMed and made
+# read-only), archived, or dropped as a whole.
+# ---------------------------------------------------------------------------
+
+PARTITION_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meeting_analytics (
+    seq INTEGER PRIMARY KEY,  -- explicit rowid so VACUUM on seal keeps export watermarks valid
+    id TEXT NOT NULL UNIQUE,
+    meeting_id TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    data TEXT,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_analytics_meeting_ts ON meeting_analytics(meeting_id, timestamp);
+CREATE INDEX IF NOT EXISTS idx_analytics_timestamp ON meeting_analytics(timestamp);
+"""
+
+_PERIOD_RE = re.compile(r'^\d{4}-\d{2}')
+
+# How many months back a late snapshot may still land in its own month.
+# Older (or future) snapshots go to the current month, so clients can't make
+# the server create, reopen or attach arbitrary partitions.
+LATE_SNAPSHOT_MONTHS = int(os.getenv('ANALYTICS_LATE_SNAPSHOT_MONTHS', '1'))
+
+# Periods known to exist and be writable (only the current month is cached,
+# since past months may be sealed by a maintenance run in another process)
+_writable_periods = set()
+
+def partition_dir():
+    """Directory holding the monthly analytics partitions"""
+    return os.getenv('LANEWAY_PARTITION_DIR') or os.path.join(os.path.dirname(DB_PATH), 'partitions')
+
+def current_period():
+    return datetime.now().strftime('%Y-%m')
+
+def _parse_period(timestamp):
+    """'YYYY-MM' of an ISO timestamp, or None if it isn't a valid date"""
+    if not isinstance(timestamp, str):
+        return None
+    try:
+        parsed = datetime.fromisoformat(timestamp)
+    except ValueError:
+        return None
+    return f"{parsed.year:04d}-{parsed.month:02d}"
+
+def _months_before(period, months):
+    year, month = divmod(int(period[:4]) * 12 + int(period[5:7]) - 1 - months, 12)
+    return f"{year:04d}-{month + 1:02d}"
+
+def partition_period(timestamp):
+    """
+    Partition ('YYYY-MM') an incoming snapshot is written to
+
+    The snapshot's own month when it is the current month, or one of the
+    previous LATE_SNAPSHOT_MONTHS months that still has a partition (active,
+    sealed or archived). Anything else - unparseable, in the future, older,
+    or in a month that was dropped or never had data - goes to the current
+    month.
+    """
+    current = current_period()
+    period = _parse_period(timestamp)
+    if period is None or period >= current or period < _months_before(current, LATE_SNAPSHOT_MONTHS):
+        return current
+    if not execute_query("SELECT 1 FROM analytics_partitions WHERE period = ?", (period,)):
+        return current
+    return period
+
+def partition_alias(period):
+    return 'p_' + period.replace('-', '_')
+
+def partition_path(period):
+    return os.path.join(partition_dir(), f"analytics_{period.replace('-', '_')}.db")
+
+def _create_partition_file(path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(PARTITION_SCHEMA)
+        conn.commit()
+    finally:
+        conn.close()
+
+def ensure_partition(period):
+    """
+    Make sure the partition for period exists and is writable
+
+    Late snapshots for a sealed or archived month reopen that partition.
+
+    Returns:
+        str: Path of the partition file
+    """
+    # The cache is only trusted for the current month: once the month rolls
+    # over, maintenance in another process may seal it
+    if period == current_period() and period in _writable_periods:
+        return partition_path(period)
+    
+    rows = execute_query("SELECT state FROM analytics_partitions WHERE period = ?", (period,))
+    state = rows[0]['state'] if rows else None
+    if state == 'archived':
+        restore_partition(period)
+        state = 'sealed'
+    if state == 'sealed':
+        unseal_partition(period)
+    
+    path = partition_path(period)
+    if not os.path.exists(path):
+        _create_partition_file(path)
+    if state is None:
+        execute_write(
+            "INSERT OR IGNORE INTO analytics_partitions (period, path, state) VALUES (?, ?, 'active')",
+            (period, path)
+        )
+    if period == current_period():
+        _writable_periods.intersection_update((period,))
+        _writable_periods.add(period)
+    return path
+
+def insert_analytics_snapshot(snapshot_id, meeting_id, timestamp, data, extra_statements=()):
+    """
+    Store one analytics snapshot in its monthly partition and update the catalog
+
+    extra_statements (execute_transaction tuples) are committed in the same
+    transaction, e.g. the search index upsert for the snapshot's participants.
+    """
+    period = partition_period(timestamp)
+    path = ensure_partition(period)
+    alias = partition_alias(period)
+    execute_transaction([
+        (
+            f"INSERT INTO {alias}.meeting_analytics (id, meeting_id, timestamp, data) VALUES (?, ?, ?, ?)",
+            (snapshot_id, meeting_id, timestamp, data),
+            False
+        ),
+        (
+            """INSERT INTO analytics_meeting_periods (meeting_id, period, first_seen, last_seen, snapshot_count)
+               VALUES (?, ?, ?, ?, 1)
+               ON CONFLICT(meeting_id, period) DO UPDATE SET
+                   first_seen = MIN(first_seen, excluded.first_seen),
+                   last_seen = MAX(last_seen, excluded.last_seen),
+                   snapshot_count = snapshot_count + 1""",
+            (meeting_id, period, timestamp, timestamp),
+            False
+        ),
+        (
+            "UPDATE analytics_partitions SET row_count = row_count + 1 WHERE period = ?",
+            (period,),
+            False
+        ),
+        *extra_statements
+    ], attach={alias: path})
+
+def analytics_periods(meeting_id=None, start=None, end=None):
+    """
+    Partitions that can hold matching snapshots, newest first
+
+    Args:
+        meeting_id: Restrict to months this meeting has snapshots in
+        start: Inclusive lower bound timestamp (ISO)
+        end: Exclusive upper bound timestamp (ISO)
+    """
+    if meeting_id is not None:
+        query = ("SELECT p.period FROM analytics_meeting_periods m "
+                 "JOIN analytics_partitions p ON p.period = m.period "
+                 "WHERE m.meeting_id = ? AND p.state != 'archived'")
+        params = [meeting_id]
+    else:
+        query = "SELECT p.period FROM analytics_partitions p WHERE p.state != 'archived'"
+        params = []
+    # Bounds that aren't valid dates are ignored rather than guessed
+    if _parse_period(start):
+        query += " AND p.period >= ?"
+        params.append(_parse_period(start))
+    if _parse_period(end):
+        query += " AND p.period <= ?"
+        params.append(_parse_period(end))
+    query += " ORDER BY p.period DESC"
+    return [row['period'] for row in execute_query(query, tuple(params))]
+
+@contextmanager
+def open_partition(period):
+    """Read-only connection to one partition"""
+    uri = Path(partition_path(period)).resolve().as_uri() + '?mode=ro'
+    conn = sqlite3.connect(uri, uri=True)
+    conn.row_factory = sqlite3.Row
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+def iter_analytics(meeting_id=None, start=None, end=None, newest_first=True, limit=None, chunk_size=500):
+    """
+    Stream analytics snapshot rows, touching only the relevant partitions
+
+    Partitions are disjoint months, so walking them in order yields rows in
+    global timestamp order without a merge.
+
+    Yields:
+        sqlite3.Row: id, meeting_id, timestamp, data, created_at
+    """
+    periods = analytics_periods(meeting_id, start, end)
+    if not newest_first:
+        periods.reverse()
+    
+    conditions = []
+    params = []
+    if meeting_id is not None:
+        conditions.append("meeting_id = ?")
+        params.append(meeting_id)
+    if start:
+        conditions.append("timestamp >= ?")
+        params.append(start)
+    if end:
+        conditions.append("timestamp < ?")
+        params.append(end)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    order = "DESC" if newest_first else "ASC"
+    
+    remaining = limit
+    for period in periods:
+        if remaining is not None and remaining <= 0:
+            return
+        if not os.path.exists(partition_path(period)):
+            continue
+        query = f"SELECT * FROM meeting_analytics {where} ORDER BY timestamp {order}"
+        query_params = list(params)
+        if remaining is not None:
+            query += " LIMIT ?"
+            query_params.append(remaining)
+        with open_partition(period) as conn:
+            cursor = conn.execute(query, query_params)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield row
+                if remaining is not None:
+                    remaining -= len(rows)
+
+def list_partitions():
+    """Catalog of analytics partitions with on-disk sizes"""
+    partitions = []
+    for row in execute_query("SELECT * FROM analytics_partitions ORDER BY period"):
+        path = row['path']
+        partitions.append({
+            "period": row['period'],
+            "state": row['state'],
+            "rowCount": row['row_count'],
+            "sizeBytes": os.path.getsize(path) if os.path.exists(path) else None,
+            "path": path,
+            "sealedAt": row['sealed_at']
+        })
+    return partitions
+
+def _check_past_period(period):
+    if not _PERIOD_RE.match(period) or len(period) != 7:
+        raise ValueError(f"Invalid period {period!r}, expected YYYY-MM")
+    if period >= current_period():
+        raise ValueError(f"Partition {period} is still receiving data")
+
+def _partition_state(period):
+    rows = execute_query("SELECT state, path FROM analytics_partitions WHERE period = ?", (period,))
+    if not rows:
+        raise ValueError(f"No partition for {period}")
+    return rows[0]['state'], rows[0]['path']
+
+def _set_writable(path, writable):
+    mode = stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH
+    if writable:
+        mode |= stat.S_IWUSR
+    os.chmod(path, mode)
+
+def seal_partition(period):
+    """
+    Compact a past month's partition and make it read-only
+
+    Returns:
+        int: Size of the sealed file in bytes
+    """
+    _check_past_period(period)
+    state, path = _partition_state(period)
+    if state != 'active':
+        return os.path.getsize(path) if os.path.exists(path) else 0
+    
+    conn = sqlite3.connect(path)
+    try:
+        # Fold the WAL back in so the partition is a single self-contained file
+        conn.execute("PRAGMA journal_mode=DELETE")
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+    _set_writable(path, False)
+    _writable_periods.discard(period)
+    execute_write(
+        "UPDATE analytics_partitions SET state = 'sealed', sealed_at = ? WHERE period = ?",
+        (datetime.now().isoformat(), period)
+    )
+    return os.path.getsize(path)
+
+def unseal_partition(period):
+    """Make a sealed partition writable again (for late-arriving snapshots)"""
+    path = partition_path(period)
+    if os.path.exists(path):
+        _set_writable(path, True)
+    execute_write(
+        "UPDATE analytics_partitions SET state = 'active', sealed_at = NULL, path = ? WHERE period = ?",
+        (path, period)
+    )
+
+def archive_partition(period, archive_dir=None):
+    """
+    Seal a past month and move its file out of the live partition directory
+
+    Archived partitions are skipped by reads until restored.
+
+    Returns:
+        str: Path of the archived file
+    """
+    state, path = _partition_state(period)
+    if state == 'archived':
+        return path
+    seal_partition(period)
+    archive_dir = archive_dir or os.path.join(partition_dir(), 'archive')
+    os.makedirs(archive_dir, exist_ok=True)
+    target = os.path.join(archive_dir, os.path.basename(path))
+    shutil.move(path, target)
+    execute_write(
+        "UPDATE analytics_partitions SET state = 'archived', path = ? WHERE period = ?",
+        (target, period)
+    )
+    return target
+
+def restore_partition(period):
+    """Move an archived partition back into the live directory (still sealed)"""
+    state, path = _partition_state(period)
+    if state != 'archived':
+        return partition_path(period)
+    target = partition_path(period)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    shutil.move(path, target)
+    execute_write(
+        "UPDATE analytics_partitions SET state = 'sealed', path = ? WHERE period = ?",
+        (target, period)
+    )
+    return target
+
+def drop_partition(period):
+    """
+    Delete a past month of analytics in one step (replaces row-by-row deletes)
+
+    Returns:
+        int: Number of snapshots dropped
+    """
+    _check_past_period(period)
+    state, path = _partition_state(period)
+    rows = execute_query("SELECT row_count FROM analytics_partitions WHERE period = ?", (period,))
+    execute_transaction([
+        ("DELETE FROM analytics_meeting_periods WHERE period = ?", (period,), False),
+        ("DELETE FROM analytics_partitions WHERE period = ?", (period,), False)
+    ])
+    for suffix in ('', '-wal', '-shm', '-journal'):
+        if os.path.exists(path + suffix):
+            _set_writable(path + suffix, True)
+            os.remove(path + suffix)
+    _writable_periods.discard(period)
+    return rows[0]['row_count'] if rows else 0
+
+def drop_partitions_before(period):
+    """Retention: drop every partition older than period ('YYYY-MM')"""
+    dropped = {}
+    for row in execute_query("SELECT period FROM analytics_partitions WHERE period < ? ORDER BY period", (period,)):
+        dropped[row['period']] = drop_partition(row['period'])
+    return dropped
+
+def seal_old_partitions():
+    """Seal every active partition before the current month"""
+    sealed = []
+    for row in execute_query(
+        "SELECT period FROM analytics_partitions WHERE state = 'active' AND period < ? ORDER BY period",
+        (current_period(),)
+    ):
+        seal_partition(row['period'])
+        sealed.append(row['period'])
+    return sealed
+
+def migrate_legacy_analytics():
+    """
+    Move snapshots from the old single meeting_analytics table into partitions
+
+    Returns:
+        int: Number of snapshots moved
+    """
+    period_expr = ("CASE WHEN timestamp GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]*' "
+                   "THEN substr(timestamp, 1, 7) ELSE substr(created_at, 1, 7) END")
+    conn = sqlite3.connect(DB_PATH)
+    moved = 0
+    try:
+        periods = [row[0] for row in conn.execute(f"SELECT DISTINCT {period_expr} FROM main.meeting_analytics")]
+        for period in periods:
+            path = partition_path(period)
+            if not os.path.exists(path):
+                _create_partition_file(path)
+            alias = partition_alias(period)
+            conn.execute(f"ATTACH DATABASE ? AS {alias}", (path,))
+            try:
+                with conn:
+                    cursor = conn.execute(
+                        f"""INSERT OR IGNORE INTO {alias}.meeting_analytics (id, meeting_id, timestamp, data, created_at)
+                            SELECT id, meeting_id, timestamp, data, created_at FROM main.meeting_analytics
+                            WHERE {period_expr} = ?""",
+                        (period,)
+                    )
+                    count = cursor.rowcount
+                    conn.execute(
+                        f"""INSERT INTO analytics_meeting_periods (meeting_id, period, first_seen, last_seen, snapshot_count)
+                            SELECT meeting_id, ?, MIN(timestamp), MAX(timestamp), COUNT(*)
+                            FROM main.meeting_analytics WHERE {period_expr} = ? GROUP BY meeting_id
+                            ON CONFLICT(meeting_id, period) DO UPDATE SET
+                                first_seen = MIN(first_seen, excluded.first_seen),
+                                last_seen = MAX(last_seen, excluded.last_seen),
+                                snapshot_count = snapshot_count + excluded.snapshot_count""",
+                        (period, period)
+                    )
+                    conn.execute(
+                        """INSERT INTO analytics_partitions (period, path, state, row_count) VALUES (?, ?, 'active', ?)
+                           ON CONFLICT(period) DO UPDATE SET row_count = row_count + excluded.row_count""",
+                        (period, path, count)
+                    )
+                    conn.execute(f"DELETE FROM main.meeting_analytics WHERE {period_expr} = ?", (period,))
+                    moved += count
+            finally:
+                conn.execute(f"DETACH DATABASE {alias}")
+    finally:
+        conn.close()
+    return moved
@@ -7,7 +7,8 @@ CREATE TABLE IF NOT EXISTS meeting_recordings (
     meeting_id TEXT NOT NULL,
     s3_key TEXT,
     storage_key TEXT,  -- R2/S3 storage key
-    status TEXT DEFAULT 'uploading',  -- 'uploading', 'processing', 'completed', 'failed'
+    user_id TEXT,      -- uploader (verify_token sub); added to older databases by init_database
+    status TEXT DEFAULT 'uploading',  -- 'uploading', 'uploaded', 'processing', 'completed', 'failed'
     duration INTEGER,
     file_size INTEGER,
     uploaded_at TEXT,
@@ -66,7 +67,32 @@ CREATE TABLE IF NOT EXISTS employees (
 
 CREATE INDEX IF NOT EXISTS idx_employees_email ON employees(email);
 
--- Meeting analytics snapshots (for real-time tracking)
+-- Employee directory version (bumped on any employees change, used to invalidate cached lookups)
+CREATE TABLE IF NOT EXISTS directory_version (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    version INTEGER NOT NULL DEFAULT 0
+);
+
+INSERT OR IGNORE INTO directory_version (id, version) VALUES (1, 0);
+
+CREATE TRIGGER IF NOT EXISTS trg_employees_insert_version AFTER INSERT ON employees
+BEGIN
+    UPDATE directory_version SET version = version + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_employees_update_version AFTER UPDATE ON employees
+BEGIN
+    UPDATE directory_version SET version = version + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_employees_delete_version AFTER DELETE ON employees
+BEGIN
+    UPDATE directory_version SET version = version + 1 WHERE id = 1;
+END;
+
+-- Meeting analytics snapshots (legacy single table)
+-- Snapshots now live in monthly partition files (database/partitions/analytics_YYYY_MM.db,
+-- managed by database.py); rows found here are moved into partitions on startup
 CREATE TABLE IF NOT EXISTS meeting_analytics (
     id TEXT PRIMARY KEY,
     meeting_id TEXT NOT NULL,
@@ -77,3 +103,187 @@ CREATE TABLE IF NOT EXISTS meeting_analytics (
 
 CREATE INDEX IF NOT EXISTS idx_analytics_meeting_id ON meeting_analytics(meeting_id);
 CREATE INDEX IF NOT EXISTS idx_analytics_timestamp ON meeting_analytics(timestamp);
+
+-- Catalog of monthly analytics partitions
+CREATE TABLE IF NOT EXISTS analytics_partitions (
+    period TEXT PRIMARY KEY,          -- 'YYYY-MM'
+    path TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'active',  -- 'active', 'sealed', 'archived'
+    row_count INTEGER DEFAULT 0,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    sealed_at TEXT
+);
+
+-- Which partitions each meeting has snapshots in (also serves the meeting list)
+CREATE TABLE IF NOT EXISTS analytics_meeting_periods (
+    meeting_id TEXT NOT NULL,
+    period TEXT NOT NULL,
+    first_seen TEXT,
+    last_seen TEXT,
+    snapshot_count INTEGER DEFAULT 0,
+    PRIMARY KEY (meeting_id, period)
+);
+
+CREATE INDEX IF NOT EXISTS idx_meeting_periods_period ON analytics_meeting_periods(period);
+
+-- Progress of incremental columnar exports (see export.py)
+CREATE TABLE IF NOT EXISTS export_watermarks (
+    name TEXT PRIMARY KEY,     -- '<consumer>:<table>'
+    watermark TEXT NOT NULL,   -- JSON: {period: last seq} for snapshots, {"rowid": n} for participants
+    updated_at TEXT
+);
+
+-- Everyone seen in a meeting, from analytics snapshots and completed recordings (see search.py)
+CREATE TABLE IF NOT EXISTS meeting_attendees (
+    id INTEGER PRIMARY KEY,
+    meeting_id TEXT NOT NULL,
+    name TEXT NOT NULL DEFAULT '',
+    email TEXT NOT NULL DEFAULT '',
+    first_seen TEXT,
+    last_seen TEXT,
+    UNIQUE (meeting_id, name, email)
+);
+
+CREATE INDEX IF NOT EXISTS idx_attendees_last_seen ON meeting_attendees(last_seen);
+
+-- Full-text indexes (external content: the FTS tables store only the index, triggers keep them in sync)
+-- Rebuild with `python manage.py search-index rebuild` after bulk changes or VACUUM
+CREATE VIRTUAL TABLE IF NOT EXISTS absences_fts USING fts5(
+    reason, absence_type, employee_name,
+    content='meeting_absences', content_rowid='rowid',
+    tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_absences_fts_insert AFTER INSERT ON meeting_absences
+BEGIN
+    INSERT INTO absences_fts (rowid, reason, absence_type, employee_name)
+    VALUES (new.rowid, new.reason, new.absence_type, new.employee_name);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_absences_fts_delete AFTER DELETE ON meeting_absences
+BEGIN
+    INSERT INTO absences_fts (absences_fts, rowid, reason, absence_type, employee_name)
+    VALUES ('delete', old.rowid, old.reason, old.absence_type, old.employee_name);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_absences_fts_update AFTER UPDATE OF reason, absence_type, employee_name ON meeting_absences
+BEGIN
+    INSERT INTO absences_fts (absences_fts, rowid, reason, absence_type, employee_name)
+    VALUES ('delete', old.rowid, old.reason, old.absence_type, old.employee_name);
+    INSERT INTO absences_fts (rowid, reason, absence_type, employee_name)
+    VALUES (new.rowid, new.reason, new.absence_type, new.employee_name);
+END;
+
+CREATE VIRTUAL TABLE IF NOT EXISTS attendees_fts USING fts5(
+    name, email,
+    content='meeting_attendees', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_attendees_fts_insert AFTER INSERT ON meeting_attendees
+BEGIN
+    INSERT INTO attendees_fts (rowid, name, email) VALUES (new.id, new.name, new.email);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_attendees_fts_delete AFTER DELETE ON meeting_attendees
+BEGIN
+    INSERT INTO attendees_fts (attendees_fts, rowid, name, email) VALUES ('delete', old.id, old.name, old.email);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_attendees_fts_update AFTER UPDATE OF name, email ON meeting_attendees
+BEGIN
+    INSERT INTO attendees_fts (attendees_fts, rowid, name, email) VALUES ('delete', old.id, old.name, old.email);
+    INSERT INTO attendees_fts (rowid, name, email) VALUES (new.id, new.name, new.email);
+END;
+
+-- Storage ledger: one row per object in the recordings bucket (see ledger.py)
+CREATE TABLE IF NOT EXISTS storage_ledger (
+    storage_key TEXT PRIMARY KEY,
+    recording_id TEXT,
+    meeting_id TEXT,
+    user_id TEXT,
+    size_bytes INTEGER NOT NULL DEFAULT 0,
+    recorded_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Running totals per scope, kept up to date by the ledger triggers below
+CREATE TABLE IF NOT EXISTS storage_usage (
+    scope TEXT NOT NULL,        -- 'total', 'meeting', 'user'
+    scope_id TEXT NOT NULL,     -- '' for total
+    bytes INTEGER NOT NULL DEFAULT 0,
+    objects INTEGER NOT NULL DEFAULT 0,
+    updated_at TEXT,
+    PRIMARY KEY (scope, scope_id)
+);
+
+-- Daily history per scope: net change during the day and the total at its last change
+CREATE TABLE IF NOT EXISTS storage_usage_daily (
+    scope TEXT NOT NULL,
+    scope_id TEXT NOT NULL,
+    day TEXT NOT NULL,          -- YYYY-MM-DD (UTC)
+    change_bytes INTEGER NOT NULL DEFAULT 0,
+    bytes INTEGER NOT NULL DEFAULT 0,
+    objects INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (scope, scope_id, day)
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_storage_ledger_insert AFTER INSERT ON storage_ledger
+BEGIN
+    INSERT INTO storage_usage (scope, scope_id, bytes, objects, updated_at)
+    VALUES ('total', '', new.size_bytes, 1, CURRENT_TIMESTAMP),
+           ('meeting', COALESCE(new.meeting_id, ''), new.size_bytes, 1, CURRENT_TIMESTAMP),
+           ('user', COALESCE(new.user_id, ''), new.size_bytes, 1, CURRENT_TIMESTAMP)
+    ON CONFLICT(scope, scope_id) DO UPDATE SET
+        bytes = bytes + excluded.bytes, objects = objects + 1, updated_at = excluded.updated_at;
+    INSERT INTO storage_usage_daily (scope, scope_id, day, change_bytes, bytes, objects)
+    SELECT scope, scope_id, date('now'), new.size_bytes, bytes, objects FROM storage_usage
+    WHERE (scope = 'total' AND scope_id = '')
+       OR (scope = 'meeting' AND scope_id = COALESCE(new.meeting_id, ''))
+       OR (scope = 'user' AND scope_id = COALESCE(new.user_id, ''))
+    ON CONFLICT(scope, scope_id, day) DO UPDATE SET
+        change_bytes = change_bytes + excluded.change_bytes, bytes = excluded.bytes, objects = excluded.objects;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_storage_ledger_delete AFTER DELETE ON storage_ledger
+BEGIN
+    UPDATE storage_usage SET bytes = bytes - old.size_bytes, objects = objects - 1, updated_at = CURRENT_TIMESTAMP
+    WHERE (scope = 'total' AND scope_id = '')
+       OR (scope = 'meeting' AND scope_id = COALESCE(old.meeting_id, ''))
+       OR (scope = 'user' AND scope_id = COALESCE(old.user_id, ''));
+    INSERT INTO storage_usage_daily (scope, scope_id, day, change_bytes, bytes, objects)
+    SELECT scope, scope_id, date('now'), -old.size_bytes, bytes, objects FROM storage_usage
+    WHERE (scope = 'total' AND scope_id = '')
+       OR (scope = 'meeting' AND scope_id = COALESCE(old.meeting_id, ''))
+       OR (scope = 'user' AND scope_id = COALESCE(old.user_id, ''))
+    ON CONFLICT(scope, scope_id, day) DO UPDATE SET
+        change_bytes = change_bytes + excluded.change_bytes, bytes = excluded.bytes, objects = excluded.objects;
+END;
+
+-- A size or attribution change is booked as removing the old row and adding the new one
+CREATE TRIGGER IF NOT EXISTS trg_storage_ledger_update AFTER UPDATE OF size_bytes, meeting_id, user_id ON storage_ledger
+BEGIN
+    UPDATE storage_usage SET bytes = bytes - old.size_bytes, objects = objects - 1, updated_at = CURRENT_TIMESTAMP
+    WHERE (scope = 'total' AND scope_id = '')
+       OR (scope = 'meeting' AND scope_id = COALESCE(old.meeting_id, ''))
+       OR (scope = 'user' AND scope_id = COALESCE(old.user_id, ''));
+    INSERT INTO storage_usage_daily (scope, scope_id, day, change_bytes, bytes, objects)
+    SELECT scope, scope_id, date('now'), -old.size_bytes, bytes, objects FROM storage_usage
+    WHERE (scope = 'total' AND scope_id = '')
+       OR (scope = 'meeting' AND scope_id = COALESCE(old.meeting_id, ''))
+       OR (scope = 'user' AND scope_id = COALESCE(old.user_id, ''))
+    ON CONFLICT(scope, scope_id, day) DO UPDATE SET
+        change_bytes = change_bytes + excluded.change_bytes, bytes = excluded.bytes, objects = excluded.objects;
+    INSERT INTO storage_usage (scope, scope_id, bytes, objects, updated_at)
+    VALUES ('total', '', new.size_bytes, 1, CURRENT_TIMESTAMP),
+           ('meeting', COALESCE(new.meeting_id, ''), new.size_bytes, 1, CURRENT_TIMESTAMP),
+           ('user', COALESCE(new.user_id, ''), new.size_bytes, 1, CURRENT_TIMESTAMP)
+    ON CONFLICT(scope, scope_id) DO UPDATE SET
+        bytes = bytes + excluded.bytes, objects = objects + 1, updated_at = excluded.updated_at;
+    INSERT INTO storage_usage_daily (scope, scope_id, day, change_bytes, bytes, objects)
+    SELECT scope, scope_id, date('now'), new.size_bytes, bytes, objects FROM storage_usage
+    WHERE (scope = 'total' AND scope_id = '')
+       OR (scope = 'meeting' AND scope_id = COALESCE(new.meeting_id, ''))
+       OR (scope = 'user' AND scope_id = COALESCE(new.user_id, ''))
+    ON CONFLICT(scope, scope_id, day) DO UPDATE SET
+        change_bytes = change_bytes + excluded.change_bytes, bytes = excluded.bytes, objects = excluded.objects;
+END;
@@ -0,0 +1,180 @@
+"""
+Employee directory cache
+Keeps employee name/email/department lookups in memory so absence submissions
+don't hit the employees table on every request
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from database import execute_query
+
+DEFAULT_MAX_ENTRIES = int(os.getenv('EMPLOYEE_CACHE_MAX_ENTRIES', '10000'))
+DEFAULT_TTL = float(os.getenv('EMPLOYEE_CACHE_TTL', '600'))
+DEFAULT_VERSION_CHECK_INTERVAL = float(os.getenv('EMPLOYEE_CACHE_VERSION_CHECK', '5'))
+
+# SQLite's default host parameter limit is 999 on older builds
+LOOKUP_CHUNK_SIZE = 500
+
+
+class EmployeeDirectory:
+    """
+    Bounded LRU cache of employee records
+
+    Entries expire after a TTL, and the whole cache is dropped whenever the
+    employees table version (bumped by triggers in schema.sql) changes.
+    Unknown IDs are cached too, so repeated lookups of missing employees
+    stay cheap until the table changes.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL,
+                 version_check_interval=DEFAULT_VERSION_CHECK_INTERVAL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.version_check_interval = version_check_interval
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = None
+        self._version_checked_at = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.lookups = 0
+
+    def preload(self):
+        """
+        Warm the cache from the employees table
+
+        Returns:
+            int: Number of employees loaded
+        """
+        version = self._read_version()
+        rows = execute_query(
+            "SELECT id, full_name, email, department FROM employees ORDER BY created_at DESC LIMIT ?",
+            (self.max_entries,)
+        )
+        expires_at = time.monotonic() + self.ttl
+        with self._lock:
+            self._entries.clear()
+            for row in rows:
+                self._entries[row['id']] = (_employee_record(row), expires_at)
+            self._version = version
+            self._version_checked_at = time.monotonic()
+        return len(rows)
+
+    def get(self, employee_id):
+        """
+        Look up a single employee
+
+        Returns:
+            dict: Employee record, or None if the employee does not exist
+        """
+        return self.get_many([employee_id]).get(employee_id)
+
+    def get_many(self, employee_ids):
+        """
+        Look up several employees, fetching all misses in one query
+
+        Args:
+            employee_ids: Iterable of employee IDs
+
+        Returns:
+            dict: employee_id -> record (None for unknown employees)
+        """
+        self._check_version()
+        now = time.monotonic()
+        found = {}
+        missing = []
+
+        with self._lock:
+            for employee_id in dict.fromkeys(employee_ids):
+                cached = self._entries.get(employee_id)
+                if cached is not None and cached[1] > now:
+                    self._entries.move_to_end(employee_id)
+                    found[employee_id] = cached[0]
+                    self.hits += 1
+                else:
+                    missing.append(employee_id)
+                    self.misses += 1
+
+        if missing:
+            fetched = {}
+            for start in range(0, len(missing), LOOKUP_CHUNK_SIZE):
+                chunk = missing[start:start + LOOKUP_CHUNK_SIZE]
+                placeholders = ','.join('?' * len(chunk))
+                rows = execute_query(
+                    f"SELECT id, full_name, email, department FROM employees WHERE id IN ({placeholders})",
+                    tuple(chunk)
+                )
+                self.lookups += 1
+                for row in rows:
+                    fetched[row['id']] = _employee_record(row)
+
+            expires_at = time.monotonic() + self.ttl
+            with self._lock:
+                for employee_id in missing:
+                    record = fetched.get(employee_id)
+                    self._entries[employee_id] = (record, expires_at)
+                    self._entries.move_to_end(employee_id)
+                    found[employee_id] = record
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+
+        return found
+
+    def invalidate(self, employee_id=None):
+        """Drop one employee, or the whole cache"""
+        with self._lock:
+            if employee_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(employee_id, None)
+
+    def stats(self):
+        """Cache size and hit ratio"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "maxEntries": self.max_entries,
+                "ttlSeconds": self.ttl,
+                "version": self._version,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hitRatio": round(self.hits / total, 4) if total else 0.0,
+                "dbLookups": self.lookups
+            }
+
+    def _check_version(self):
+        """Clear the cache if the employees table changed since the last check"""
+        now = time.monotonic()
+        if now - self._version_checked_at < self.version_check_interval:
+            return
+        version = self._read_version()
+        with self._lock:
+            self._version_checked_at = now
+            if version != self._version:
+                self._entries.clear()
+                self._version = version
+
+    def _read_version(self):
+        try:
+            rows = execute_query("SELECT version FROM directory_version WHERE id = 1")
+        except sqlite3.OperationalError:
+            # Database predates the version table; fall back to TTL-only expiry
+            return None
+        return rows[0]['version'] if rows else 0
+
+
+def _employee_record(row):
+    return {
+        "full_name": row['full_name'],
+        "email": row['email'],
+        "department": row['department']
+    }
+
+
+# Shared directory used by the API routers
+employee_directory = EmployeeDirectory()
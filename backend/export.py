@@ -0,0 +1,394 @@
+"""
+Columnar export of meeting analytics
+Flattens analytics snapshots (one row per participant per snapshot) and
+meeting_participants into Parquet / Arrow IPC files, or CSV when pyarrow is
+not installed. Rows are read and written in chunks, and every export picks up
+from a watermark so repeated runs only ship new data.
+"""
+
+import base64
+import csv
+import json
+import os
+import re
+from datetime import datetime
+
+import database
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+
+DEFAULT_CHUNK_SIZE = 5000
+
+WATERMARK_PERIOD = re.compile(r'^\d{4}-(0[1-9]|1[0-2])$')
+
+FORMATS = ('parquet', 'arrow', 'csv')
+
+EXTENSIONS = {'parquet': '.parquet', 'arrow': '.arrow', 'csv': '.csv'}
+
+MEDIA_TYPES = {
+    'parquet': 'application/vnd.apache.parquet',
+    'arrow': 'application/vnd.apache.arrow.stream',
+    'csv': 'text/csv'
+}
+
+# Column name -> pyarrow type name, per exportable table
+COLUMNS = {
+    'snapshots': [
+        ('snapshot_id', 'string'),
+        ('meeting_id', 'string'),
+        ('snapshot_timestamp', 'string'),
+        ('participant_count', 'int64'),
+        ('participant_id', 'string'),
+        ('participant_name', 'string'),
+        ('device_id', 'string'),
+        ('join_time', 'string'),
+        ('leave_time', 'string'),
+        ('camera_on', 'bool'),
+        ('audio_muted', 'bool'),
+        ('camera_on_duration', 'int64'),
+        ('speaking_event_count', 'int64'),
+        ('speaking_seconds', 'int64'),
+    ],
+    'participants': [
+        ('id', 'string'),
+        ('meeting_id', 'string'),
+        ('employee_id', 'string'),
+        ('employee_name', 'string'),
+        ('employee_email', 'string'),
+        ('join_time', 'string'),
+        ('leave_time', 'string'),
+        ('camera_on_duration', 'int64'),
+        ('speaking_duration', 'int64'),
+        ('engagement_score', 'float64'),
+        ('created_at', 'string'),
+    ]
+}
+
+TABLES = tuple(COLUMNS)
+
+
+def resolve_format(fmt):
+    """Fall back to CSV when pyarrow is unavailable"""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r}, expected one of {', '.join(FORMATS)}")
+    if fmt != 'csv' and pa is None:
+        print(f"⚠️  pyarrow not installed, exporting CSV instead of {fmt}")
+        return 'csv'
+    return fmt
+
+
+# ---------------------------------------------------------------------------
+# Watermarks
+# ---------------------------------------------------------------------------
+
+def encode_watermark(watermark):
+    """Opaque token for a watermark dict"""
+    raw = json.dumps(watermark, separators=(',', ':'), sort_keys=True).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_watermark(token):
+    if not token:
+        return {}
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        watermark = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid export watermark")
+    if not isinstance(watermark, dict):
+        raise ValueError("Invalid export watermark")
+    # Keys are partition periods (snapshots) or 'rowid' (participants); values are rowids
+    for key, value in watermark.items():
+        if not (key == 'rowid' or WATERMARK_PERIOD.match(key)):
+            raise ValueError("Invalid export watermark")
+        if isinstance(value, bool) or not isinstance(value, int) or value < 0:
+            raise ValueError("Invalid export watermark")
+    return watermark
+
+
+def load_watermark(name, table):
+    rows = database.execute_query(
+        "SELECT watermark FROM export_watermarks WHERE name = ?",
+        (f"{name}:{table}",)
+    )
+    return json.loads(rows[0]['watermark']) if rows else {}
+
+
+def save_watermark(name, table, watermark):
+    database.execute_write(
+        """INSERT INTO export_watermarks (name, watermark, updated_at) VALUES (?, ?, ?)
+           ON CONFLICT(name) DO UPDATE SET watermark = excluded.watermark, updated_at = excluded.updated_at""",
+        (f"{name}:{table}", json.dumps(watermark), datetime.now().isoformat())
+    )
+
+
+def high_water_mark(table):
+    """
+    Current end of each source, fixed at the start of an export so rows
+    inserted while it runs are left for the next one
+
+    Snapshots are tracked per partition (rowids are per file); participants by rowid.
+    """
+    if table == 'snapshots':
+        marks = {}
+        for period in database.analytics_periods():
+            if not os.path.exists(database.partition_path(period)):
+                continue
+            with database.open_partition(period) as conn:
+                marks[period] = conn.execute("SELECT COALESCE(MAX(rowid), 0) FROM meeting_analytics").fetchone()[0]
+        return marks
+    rows = database.execute_query("SELECT COALESCE(MAX(rowid), 0) AS hi FROM meeting_participants")
+    return {'rowid': rows[0]['hi']}
+
+
+# ---------------------------------------------------------------------------
+# Row sources
+# ---------------------------------------------------------------------------
+
+def _snapshot_rows(row):
+    """Flatten one snapshot into one row per participant (or a single empty row)"""
+    try:
+        data = json.loads(row['data']) if row['data'] else {}
+    except ValueError:
+        data = {}
+    participants = data.get('participants') or []
+    base = (row['id'], row['meeting_id'], row['timestamp'], len(participants))
+    if not participants:
+        yield base + (None,) * 10
+        return
+    for p in participants:
+        if not isinstance(p, dict):
+            continue
+        events = p.get('speakingEvents') or []
+        yield base + (
+            _text(p.get('id')),
+            _text(p.get('name')),
+            _text(p.get('deviceId')),
+            _text(p.get('joinTime')),
+            _text(p.get('leaveTime')),
+            _bool(p.get('cameraOn')),
+            _bool(p.get('audioMuted')),
+            _int(p.get('cameraOnDuration')),
+            len(events),
+            sum(_int(e.get('duration')) or 0 for e in events if isinstance(e, dict))
+        )
+
+
+def _text(value):
+    return None if value is None else str(value)
+
+
+def _bool(value):
+    return None if value is None else bool(value)
+
+
+def _int(value):
+    try:
+        return None if value is None else int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def iter_chunks(table, since, until, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Yield lists of flat row tuples between two watermarks
+
+    Args:
+        table: 'snapshots' or 'participants'
+        since: Watermark already exported ({} for everything)
+        until: High-water mark from high_water_mark()
+        chunk_size: Source rows read per query
+    """
+    if table == 'snapshots':
+        for period in sorted(until):
+            low, high = since.get(period, 0), until[period]
+            if high <= low:
+                continue
+            with database.open_partition(period) as conn:
+                cursor = conn.execute(
+                    "SELECT rowid, id, meeting_id, timestamp, data FROM meeting_analytics "
+                    "WHERE rowid > ? AND rowid <= ? ORDER BY rowid",
+                    (low, high)
+                )
+                while True:
+                    rows = cursor.fetchmany(chunk_size)
+                    if not rows:
+                        break
+                    chunk = []
+                    for row in rows:
+                        chunk.extend(_snapshot_rows(row))
+                    yield chunk
+        return
+
+    low, high = since.get('rowid', 0), until['rowid']
+    columns = ', '.join(name for name, _ in COLUMNS['participants'])
+    with database.get_db() as conn:
+        cursor = conn.execute(
+            f"SELECT {columns} FROM meeting_participants WHERE rowid > ? AND rowid <= ? ORDER BY rowid",
+            (low, high)
+        )
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield [tuple(row) for row in rows]
+
+
+# ---------------------------------------------------------------------------
+# Sinks
+# ---------------------------------------------------------------------------
+
+class StreamBuffer:
+    """Write-only file object that hands written bytes back out in pieces (for HTTP streaming)"""
+
+    def __init__(self):
+        self._parts = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data):
+        data = bytes(data)
+        self._parts.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b''.join(self._parts)
+        self._parts = []
+        return data
+
+
+class ExportWriter:
+    """Writes chunks of flat rows to a file-like object in the chosen format"""
+
+    def __init__(self, table, fmt, sink):
+        self.columns = COLUMNS[table]
+        self.fmt = fmt
+        self.sink = sink
+        self.rows = 0
+        self._writer = None
+        if fmt == 'csv':
+            self._writer = csv.writer(_TextAdapter(sink))
+            self._writer.writerow([name for name, _ in self.columns])
+        else:
+            self.schema = pa.schema([(name, pa.type_for_alias(type_name)) for name, type_name in self.columns])
+            if fmt == 'parquet':
+                self._writer = pa.parquet.ParquetWriter(sink, self.schema, compression='zstd')
+            else:
+                self._writer = pa.ipc.new_stream(sink, self.schema)
+
+    def write(self, chunk):
+        if not chunk:
+            return
+        self.rows += len(chunk)
+        if self.fmt == 'csv':
+            self._writer.writerows(chunk)
+            return
+        arrays = [
+            pa.array([row[i] for row in chunk], type=self.schema.field(i).type)
+            for i in range(len(self.columns))
+        ]
+        batch = pa.RecordBatch.from_arrays(arrays, schema=self.schema)
+        if self.fmt == 'parquet':
+            self._writer.write_batch(batch, row_group_size=len(chunk))
+        else:
+            self._writer.write_batch(batch)
+
+    def close(self):
+        if self.fmt != 'csv':
+            self._writer.close()
+
+
+class _TextAdapter:
+    """Lets csv.writer write UTF-8 into a binary sink"""
+
+    def __init__(self, sink):
+        self.sink = sink
+
+    def write(self, text):
+        return self.sink.write(text.encode('utf-8'))
+
+
+# ---------------------------------------------------------------------------
+# Entry points
+# ---------------------------------------------------------------------------
+
+def stream_export(table, fmt, since, until, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Generator of encoded bytes for an HTTP response
+
+    Memory stays bounded by one chunk: each chunk is encoded and handed out
+    before the next is read.
+    """
+    buffer = StreamBuffer()
+    sink = pa.PythonFile(buffer, mode='w') if fmt != 'csv' else buffer
+    writer = ExportWriter(table, fmt, sink)
+    for chunk in iter_chunks(table, since, until, chunk_size):
+        writer.write(chunk)
+        data = buffer.drain()
+        if data:
+            yield data
+    writer.close()
+    data = buffer.drain()
+    if data:
+        yield data
+
+
+def export_to_file(table, fmt='parquet', out_dir='exports', name='default', full=False,
+                   chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Export new rows of a table to a file and advance the stored watermark
+
+    Args:
+        table: 'snapshots' or 'participants'
+        fmt: 'parquet', 'arrow' or 'csv' (falls back to csv without pyarrow)
+        out_dir: Directory for the output file
+        name: Watermark name, so separate consumers can track their own progress
+        full: Ignore the stored watermark and export everything
+
+    Returns:
+        dict: Output path and row count (path is None when there was nothing new)
+    """
+    if table not in COLUMNS:
+        raise ValueError(f"Unknown export table {table!r}, expected one of {', '.join(TABLES)}")
+    fmt = resolve_format(fmt)
+    since = {} if full else load_watermark(name, table)
+    until = high_water_mark(table)
+
+    os.makedirs(out_dir, exist_ok=True)
+    stamp = datetime.now().strftime('%Y%m%dT%H%M%S')
+    path = os.path.join(out_dir, f"{table}_{stamp}{EXTENSIONS[fmt]}")
+    partial = path + '.partial'
+
+    try:
+        with open(partial, 'wb') as f:
+            writer = ExportWriter(table, fmt, f)
+            for chunk in iter_chunks(table, since, until, chunk_size):
+                writer.write(chunk)
+            writer.close()
+            rows = writer.rows
+    except BaseException:
+        os.remove(partial)
+        raise
+
+    if rows == 0:
+        os.remove(partial)
+        path = None
+    else:
+        os.replace(partial, path)
+    save_watermark(name, table, {**since, **until})
+    return {"path": path, "rows": rows, "format": fmt, "watermark": encode_watermark({**since, **until})}
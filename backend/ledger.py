@@ -0,0 +1,161 @@
+"""
+Storage ledger for the recordings bucket
+Tracks the size of every stored object in SQLite (storage_ledger) so usage per
+recording, meeting and user can be read without listing the bucket. Triggers
+in schema.sql roll each ledger change into storage_usage (running totals) and
+storage_usage_daily (history). The ledger is written when uploads complete and
+when retention deletes objects, and reconcile_with_bucket() corrects any drift
+against a full bucket listing.
+"""
+
+import time
+from datetime import datetime, timedelta, timezone
+
+from database import execute_query, execute_transaction
+
+SCOPES = ('total', 'meeting', 'user')
+
+LEDGER_UPSERT = """INSERT INTO storage_ledger (storage_key, recording_id, meeting_id, user_id, size_bytes)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT(storage_key) DO UPDATE SET
+        recording_id = COALESCE(excluded.recording_id, recording_id),
+        meeting_id = COALESCE(excluded.meeting_id, meeting_id),
+        user_id = COALESCE(excluded.user_id, user_id),
+        size_bytes = excluded.size_bytes,
+        recorded_at = CURRENT_TIMESTAMP
+    WHERE size_bytes != excluded.size_bytes
+       OR meeting_id IS NOT COALESCE(excluded.meeting_id, meeting_id)
+       OR user_id IS NOT COALESCE(excluded.user_id, user_id)"""
+
+LEDGER_DELETE = "DELETE FROM storage_ledger WHERE storage_key = ?"
+
+
+def record_statement(rows):
+    """
+    execute_transaction statement recording stored objects
+
+    Args:
+        rows: (storage_key, recording_id, meeting_id, user_id, size_bytes) tuples
+    """
+    return (LEDGER_UPSERT, rows, True)
+
+
+def usage(scope='total', scope_id=''):
+    """
+    Current bytes and object count for a scope (a single primary-key read)
+
+    Args:
+        scope: 'total', 'meeting' or 'user'
+        scope_id: Meeting or user ID ('' for total)
+    """
+    if scope not in SCOPES:
+        raise ValueError(f"scope must be one of {', '.join(SCOPES)}")
+    rows = execute_query(
+        "SELECT bytes, objects, updated_at FROM storage_usage WHERE scope = ? AND scope_id = ?",
+        (scope, scope_id if scope != 'total' else '')
+    )
+    if not rows:
+        return {"bytes": 0, "objects": 0, "updatedAt": None}
+    return {"bytes": rows[0]['bytes'], "objects": rows[0]['objects'], "updatedAt": rows[0]['updated_at']}
+
+
+def growth(scope='total', scope_id='', days=30):
+    """Per-day net change and end-of-day totals for the last `days` days (days with changes only)"""
+    if scope not in SCOPES:
+        raise ValueError(f"scope must be one of {', '.join(SCOPES)}")
+    since = (datetime.now(timezone.utc) - timedelta(days=days)).strftime('%Y-%m-%d')
+    rows = execute_query(
+        """SELECT day, change_bytes, bytes, objects FROM storage_usage_daily
+           WHERE scope = ? AND scope_id = ? AND day > ?
+           ORDER BY day""",
+        (scope, scope_id if scope != 'total' else '', since)
+    )
+    return [
+        {"day": r['day'], "changeBytes": r['change_bytes'], "bytes": r['bytes'], "objects": r['objects']}
+        for r in rows
+    ]
+
+
+def apply_retention(storage, days=14):
+    """
+    Delete recordings older than `days` from the bucket and from the ledger
+
+    Returns:
+        dict: R2Storage.delete_old_recordings summary
+    """
+    result = storage.delete_old_recordings(days=days)
+    if result['deleted_keys']:
+        execute_transaction([(LEDGER_DELETE, [(key,) for key in result['deleted_keys']], True)])
+    return result
+
+
+def reconcile_with_bucket(storage, prefix='recordings/'):
+    """
+    Make the ledger match a full listing of the bucket
+
+    Objects missing from the ledger are added (attributed through
+    meeting_recordings where possible), sizes that differ are corrected, and
+    ledger rows for objects that no longer exist are removed (unless they were
+    recorded after the listing started). All changes are written in one
+    transaction.
+
+    Returns:
+        dict: Counts of listed, added, resized and removed objects
+    """
+    started = time.monotonic()
+    # Rows recorded after this point may be for objects the listing missed
+    listing_started = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+    listed = {obj['key']: obj['size'] for obj in storage.iter_objects(prefix)}
+    ledger = {}
+    recent = set()
+    for r in execute_query(
+        """SELECT storage_key, size_bytes, recorded_at FROM storage_ledger
+           WHERE substr(storage_key, 1, length(?)) = ?""",
+        (prefix, prefix)
+    ):
+        ledger[r['storage_key']] = r['size_bytes']
+        if r['recorded_at'] and r['recorded_at'] >= listing_started:
+            recent.add(r['storage_key'])
+    recordings = {
+        r['storage_key']: r
+        for r in execute_query(
+            """SELECT id, meeting_id, user_id, COALESCE(storage_key, s3_key) AS storage_key
+               FROM meeting_recordings WHERE COALESCE(storage_key, s3_key) IS NOT NULL"""
+        )
+    }
+
+    upserts = []
+    added = resized = 0
+    for key, size in listed.items():
+        if ledger.get(key) == size:
+            continue
+        if key in ledger:
+            resized += 1
+        else:
+            added += 1
+        recording = recordings.get(key)
+        upserts.append((
+            key,
+            recording['id'] if recording else None,
+            recording['meeting_id'] if recording else None,
+            recording['user_id'] if recording else None,
+            size
+        ))
+    removed = [(key,) for key in ledger if key not in listed and key not in recent]
+
+    statements = []
+    if upserts:
+        statements.append(record_statement(upserts))
+    if removed:
+        statements.append((LEDGER_DELETE, removed, True))
+    if statements:
+        execute_transaction(statements)
+
+    return {
+        "listed": len(listed),
+        "added": added,
+        "resized": resized,
+        "removed": len(removed),
+        "bytes": sum(listed.values()),
+        "seconds": round(time.monotonic() - started, 3)
+    }
@@ -6,12 +6,22 @@ This API serves the Chrome extension and connects to your existing AI processing
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
+import os
+
+from cache import response_cache
+import ratelimit
+from compression import CompressionMiddleware
+from database import get_writer
+from directory import employee_directory
 
 # Import routers
 from api.auth import router as auth_router
 from api.recordings import router as recordings_router
 from api.absences import router as absences_router
 from api.analytics import router as analytics_router
+from api.metrics import router as metrics_router
+from api.search import router as search_router
+from api.storage import router as storage_router
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -20,6 +30,10 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# gzip / br / zstd request decoding and response compression. Added before CORS
+# so CORS wraps it and its own 400/413/415 errors carry the CORS headers
+app.add_middleware(CompressionMiddleware)
+
 # Configure CORS to allow Chrome extension
 # For development: Allow all origins
 # For production: Restrict to specific extension ID
@@ -37,6 +51,26 @@ app.include_router(auth_router, tags=["Authentication"])
 app.include_router(recordings_router, tags=["Recordings"])
 app.include_router(absences_router, tags=["Absences"])
 app.include_router(analytics_router, tags=["Analytics"])
+app.include_router(metrics_router, tags=["Metrics"])
+app.include_router(search_router, tags=["Search"])
+app.include_router(storage_router, tags=["Storage"])
+
+@app.on_event("startup")
+async def preload_caches():
+    """Warm the employee directory so the first absence submissions skip the lookup"""
+    # In multi-worker mode, share cache invalidations through the writer process
+    writer_client = get_writer()
+    if writer_client is not None:
+        response_cache.enable_peer_sync(writer_client)
+        # Rate limits and load shedding are enforced across workers through the writer
+        ratelimit.share_through(writer_client)
+        print(f"✅ Worker {os.getpid()} using writer at {writer_client.address}")
+    
+    try:
+        count = employee_directory.preload()
+        print(f"✅ Employee directory preloaded ({count} employees)")
+    except Exception as e:
+        print(f"⚠️  Employee directory preload failed: {e}")
 
 # Health check endpoint
 @app.get("/")
@@ -0,0 +1,190 @@
+"""
+Maintenance commands for Laneway Backend
+
+Usage:
+    python manage.py partitions list
+    python manage.py partitions seal [--period YYYY-MM]
+    python manage.py partitions archive --period YYYY-MM
+    python manage.py partitions restore --period YYYY-MM
+    python manage.py partitions drop --period YYYY-MM
+    python manage.py partitions drop --before YYYY-MM
+    python manage.py export --table snapshots --format parquet --out exports/
+    python manage.py reconcile-uploads [--stale-minutes 120] [--fail-hours 24]
+    python manage.py search-index rebuild
+    python manage.py storage usage [--scope user --id USER_ID]
+    python manage.py storage reconcile
+    python manage.py storage retention --days 14
+"""
+
+import argparse
+import os
+import sys
+from datetime import timedelta
+
+# Add backend directory to path
+sys.path.insert(0, os.path.dirname(__file__))
+
+import database
+
+
+def cmd_partitions(args):
+    if args.action == 'list':
+        partitions = database.list_partitions()
+        if not partitions:
+            print("No analytics partitions yet")
+        for p in partitions:
+            size = f"{p['sizeBytes'] / 1024:.1f} KB" if p['sizeBytes'] is not None else "missing"
+            print(f"{p['period']}  {p['state']:<9} {p['rowCount']:>10} rows  {size:>12}  {p['path']}")
+
+    elif args.action == 'seal':
+        if args.period:
+            size = database.seal_partition(args.period)
+            print(f"✅ Sealed {args.period} ({size / 1024:.1f} KB)")
+        else:
+            sealed = database.seal_old_partitions()
+            print(f"✅ Sealed {len(sealed)} partitions: {', '.join(sealed) or '-'}")
+
+    elif args.action == 'archive':
+        _require(args.period, "--period")
+        print(f"✅ Archived {args.period} to {database.archive_partition(args.period, args.archive_dir)}")
+
+    elif args.action == 'restore':
+        _require(args.period, "--period")
+        print(f"✅ Restored {args.period} to {database.restore_partition(args.period)}")
+
+    elif args.action == 'drop':
+        if args.before:
+            dropped = database.drop_partitions_before(args.before)
+            total = sum(dropped.values())
+            print(f"✅ Dropped {len(dropped)} partitions ({total} snapshots) before {args.before}")
+        else:
+            _require(args.period, "--period or --before")
+            print(f"✅ Dropped {args.period} ({database.drop_partition(args.period)} snapshots)")
+
+
+def cmd_export(args):
+    import export
+
+    tables = export.TABLES if args.table == 'all' else (args.table,)
+    for table in tables:
+        result = export.export_to_file(
+            table, fmt=args.format, out_dir=args.out, name=args.name,
+            full=args.full, chunk_size=args.chunk_size
+        )
+        if result['path']:
+            print(f"✅ Exported {result['rows']} {table} rows to {result['path']}")
+        else:
+            print(f"✅ No new {table} rows since the last export")
+
+
+def cmd_reconcile_uploads(args):
+    from reconcile import reconcile_stuck_uploads
+    from storage.r2_storage import R2Storage
+
+    storage = R2Storage(endpoint_url=args.endpoint, bucket_name=args.bucket)
+    summary = reconcile_stuck_uploads(
+        storage,
+        stale_after=timedelta(minutes=args.stale_minutes),
+        fail_after=timedelta(hours=args.fail_hours),
+        page_size=args.page_size,
+        max_workers=args.workers
+    )
+    print(f"✅ Checked {summary['scanned']} stuck recordings in {summary['seconds']}s: "
+          f"{summary['uploaded']} uploaded, {summary['failed']} failed, "
+          f"{summary['pending']} still pending, {summary['errors']} errors")
+
+
+def cmd_search_index(args):
+    import search
+
+    counts = search.rebuild_index(chunk_size=args.chunk_size)
+    print(f"✅ Rebuilt search indexes: {counts['absences']} absences, {counts['attendees']} meeting attendees")
+
+
+def cmd_storage(args):
+    import ledger
+
+    if args.action == 'usage':
+        usage = ledger.usage(args.scope, args.id or '')
+        print(f"{args.scope}{' ' + args.id if args.id else ''}: {usage['objects']} objects, "
+              f"{usage['bytes'] / 1024 / 1024:.1f} MB (updated {usage['updatedAt'] or 'never'})")
+        for day in ledger.growth(args.scope, args.id or '', args.days or 30):
+            print(f"  {day['day']}  {day['changeBytes'] / 1024 / 1024:+10.1f} MB  {day['bytes'] / 1024 / 1024:10.1f} MB")
+        return
+
+    from storage.r2_storage import R2Storage
+    storage = R2Storage(endpoint_url=args.endpoint, bucket_name=args.bucket)
+    if args.action == 'reconcile':
+        summary = ledger.reconcile_with_bucket(storage, prefix=args.prefix)
+        print(f"✅ Listed {summary['listed']} objects ({summary['bytes'] / 1024 / 1024:.1f} MB) in "
+              f"{summary['seconds']}s: {summary['added']} added, {summary['resized']} resized, "
+              f"{summary['removed']} removed from the ledger")
+    elif args.action == 'retention':
+        days = args.days or 14
+        result = ledger.apply_retention(storage, days=days)
+        print(f"✅ Deleted {result['deleted_count']} recordings older than {days} days "
+              f"({result['size_freed'] / 1024 / 1024:.1f} MB), {result['failed_count']} failed")
+
+
+def _require(value, flag):
+    if not value:
+        print(f"❌ {flag} is required")
+        sys.exit(2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Laneway Backend maintenance")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    partitions = commands.add_parser('partitions', help="Manage monthly analytics partitions")
+    partitions.add_argument('action', choices=['list', 'seal', 'archive', 'restore', 'drop'])
+    partitions.add_argument('--period', help="Partition month, YYYY-MM")
+    partitions.add_argument('--before', help="With drop: drop every partition older than this month")
+    partitions.add_argument('--archive-dir', help="With archive: destination directory")
+    partitions.set_defaults(func=cmd_partitions)
+
+    exporter = commands.add_parser('export', help="Export analytics to Parquet / Arrow / CSV since the last run")
+    exporter.add_argument('--table', choices=['snapshots', 'participants', 'all'], default='all')
+    exporter.add_argument('--format', choices=['parquet', 'arrow', 'csv'], default='parquet')
+    exporter.add_argument('--out', default='exports', help="Output directory")
+    exporter.add_argument('--name', default='default', help="Watermark name (one per downstream consumer)")
+    exporter.add_argument('--full', action='store_true', help="Ignore the watermark and export all history")
+    exporter.add_argument('--chunk-size', type=int, default=5000, help="Rows read and written per batch")
+    exporter.set_defaults(func=cmd_export)
+
+    reconciler = commands.add_parser('reconcile-uploads', help="Settle recordings stuck in 'uploading'")
+    reconciler.add_argument('--stale-minutes', type=int, default=120, help="Only check rows older than this")
+    reconciler.add_argument('--fail-hours', type=int, default=24, help="Mark rows with no object after this long as failed")
+    reconciler.add_argument('--page-size', type=int, default=500)
+    reconciler.add_argument('--workers', type=int, default=32, help="Concurrent HEAD requests")
+    reconciler.add_argument('--endpoint', help="Override R2_ENDPOINT (e.g. a local S3 stand-in)")
+    reconciler.add_argument('--bucket', help="Override R2_BUCKET_NAME")
+    reconciler.set_defaults(func=cmd_reconcile_uploads)
+
+    search_index = commands.add_parser('search-index', help="Maintain the full-text search indexes")
+    search_index.add_argument('action', choices=['rebuild'])
+    search_index.add_argument('--chunk-size', type=int, default=5000, help="Snapshots read per batch")
+    search_index.set_defaults(func=cmd_search_index)
+
+    storage = commands.add_parser('storage', help="Recording storage ledger")
+    storage.add_argument('action', choices=['usage', 'reconcile', 'retention'])
+    storage.add_argument('--scope', choices=['total', 'meeting', 'user'], default='total', help="With usage")
+    storage.add_argument('--id', help="With usage: meeting or user ID")
+    storage.add_argument('--days', type=int, help="With usage: days of history (default 30); "
+                                                  "with retention: age to delete (default 14)")
+    storage.add_argument('--prefix', default='recordings/', help="With reconcile: key prefix to list")
+    storage.add_argument('--endpoint', help="Override R2_ENDPOINT (e.g. a local S3 stand-in)")
+    storage.add_argument('--bucket', help="Override R2_BUCKET_NAME")
+    storage.set_defaults(func=cmd_storage)
+
+    args = parser.parse_args()
+    database.init_database()
+    try:
+        args.func(args)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+"""
+Rate limiting and load shedding for write endpoints
+Per-(user, meeting) token buckets stop a single misbehaving extension tab from
+flooding the writer, and a global admission check sheds writes with 429 once
+too many are in flight or the writer falls behind. In multi-worker mode the
+buckets live in the writer process (see share_through), so every worker
+draws from the same budget, and the writer's queue depth replaces the
+per-worker latency average as the overload signal.
+"""
+
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from fastapi import HTTPException
+
+# content-script.js uploads a snapshot every 30 s; leave room for a few tabs and reconnects
+ANALYTICS_PER_MINUTE = float(os.getenv('RATE_LIMIT_ANALYTICS_PER_MINUTE', '12'))
+ANALYTICS_BURST = int(os.getenv('RATE_LIMIT_ANALYTICS_BURST', '10'))
+UPLOAD_URL_PER_MINUTE = float(os.getenv('RATE_LIMIT_UPLOAD_URL_PER_MINUTE', '6'))
+UPLOAD_URL_BURST = int(os.getenv('RATE_LIMIT_UPLOAD_URL_BURST', '5'))
+MAX_TRACKED_KEYS = int(os.getenv('RATE_LIMIT_MAX_KEYS', '100000'))
+
+# Load shedding: hard cap on concurrent writes, and a lower cap once the
+# moving average of write latency exceeds the threshold
+SHED_MAX_CONCURRENT = int(os.getenv('LOAD_SHED_MAX_CONCURRENT_WRITES', '32'))
+SHED_DEGRADED_CONCURRENT = int(os.getenv('LOAD_SHED_DEGRADED_CONCURRENT_WRITES', '4'))
+SHED_LATENCY_MS = float(os.getenv('LOAD_SHED_LATENCY_MS', '250'))
+# Multi-worker mode: writes waiting in the writer's queue that count as overloaded
+SHED_WRITER_QUEUE_DEPTH = int(os.getenv('LOAD_SHED_WRITER_QUEUE_DEPTH', '64'))
+
+# Seconds a sampled writer queue depth is reused before asking again
+QUEUE_SAMPLE_INTERVAL = 0.05
+
+
+def _too_many_requests(detail, retry_after):
+    return HTTPException(
+        status_code=429,
+        detail=detail,
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+    )
+
+
+class RateLimiter:
+    """Thread-safe token buckets, one per key, with LRU eviction of idle keys"""
+
+    def __init__(self, name, per_minute, burst, max_keys=MAX_TRACKED_KEYS):
+        self.name = name
+        self.rate = per_minute / 60.0
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.limited = 0
+        self._shared = None
+
+    def share_through(self, peer):
+        """
+        Keep the buckets in another process shared by all workers
+
+        Args:
+            peer: Object with rate_limit(name, per_minute, burst, key) and
+                rate_limit_stats(name), i.e. a writer.WriterClient
+        """
+        self._shared = peer
+
+    def acquire(self, key, now=None):
+        """
+        Take one token for key
+
+        Returns:
+            float: 0 if allowed, otherwise seconds until a token is available
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                tokens = float(self.burst)
+            else:
+                tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                self._buckets.move_to_end(key)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                self.allowed += 1
+                wait = 0.0
+            else:
+                self._buckets[key] = (tokens, now)
+                self.limited += 1
+                wait = (1 - tokens) / self.rate if self.rate > 0 else 60.0
+            # An evicted key just starts again with a full bucket
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return wait
+
+    def check(self, user, meeting_id):
+        """Raise 429 with Retry-After if this user has exhausted the meeting's bucket"""
+        # meetingId comes straight from the request body, so make sure it is hashable
+        key = (user.get('sub'), meeting_id if meeting_id is None or isinstance(meeting_id, str) else str(meeting_id))
+        if self._shared is not None:
+            wait = self._shared.rate_limit(self.name, self.rate * 60, self.burst, key)
+        else:
+            wait = self.acquire(key)
+        if wait:
+            raise _too_many_requests(f"Too many {self.name} requests for this meeting", wait)
+
+    def stats(self):
+        if self._shared is not None:
+            shared = self._shared.rate_limit_stats(self.name)
+            if shared is not None:
+                return dict(shared, shared=True)
+        with self._lock:
+            total = self.allowed + self.limited
+            return {
+                "perMinute": self.rate * 60,
+                "burst": self.burst,
+                "trackedKeys": len(self._buckets),
+                "allowed": self.allowed,
+                "limited": self.limited,
+                "limitedRatio": round(self.limited / total, 4) if total else 0.0,
+                "shared": self._shared is not None
+            }
+
+
+class LoadShedder:
+    """Admission control for writes based on in-flight count and recent write latency"""
+
+    def __init__(self, max_concurrent=SHED_MAX_CONCURRENT, degraded_concurrent=SHED_DEGRADED_CONCURRENT,
+                 latency_threshold_ms=SHED_LATENCY_MS, queue_threshold=SHED_WRITER_QUEUE_DEPTH, smoothing=0.2):
+        self.max_concurrent = max_concurrent
+        self.degraded_concurrent = degraded_concurrent
+        self.latency_threshold = latency_threshold_ms / 1000.0
+        self.smoothing = smoothing
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.latency = 0.0
+        self.admitted = 0
+        self.shed_concurrency = 0
+        self.shed_latency = 0
+        self.queue_threshold = queue_threshold
+        self._writer = None
+        self._queued = 0
+        self._queued_at = 0.0
+
+    def share_through(self, peer):
+        """
+        Judge overload by the shared writer's backlog instead of this process's latency
+
+        Args:
+            peer: Object with queue_depth(), i.e. a writer.WriterClient
+        """
+        self._writer = peer
+
+    def _writer_queue_depth(self):
+        now = time.monotonic()
+        if now - self._queued_at >= QUEUE_SAMPLE_INTERVAL:
+            self._queued = self._writer.queue_depth()
+            self._queued_at = now
+        return self._queued
+
+    @property
+    def degraded(self):
+        if self._writer is not None:
+            return self._writer_queue_depth() >= self.queue_threshold
+        return self.latency > self.latency_threshold
+
+    @contextmanager
+    def admit(self):
+        """
+        Run one write, or raise 429 if the writer is saturated
+
+        While latency (or, when shared, the writer's queue) is over the
+        threshold only degraded_concurrent writes are let through; they keep
+        feeding the latency average so it can recover.
+        """
+        # Sampled outside the lock: in multi-worker mode this asks the writer
+        degraded = self.degraded
+        with self._lock:
+            limit = self.degraded_concurrent if degraded else self.max_concurrent
+            if self.in_flight >= limit:
+                if degraded:
+                    self.shed_latency += 1
+                else:
+                    self.shed_concurrency += 1
+                # Roughly the time for the writes ahead of this one to drain
+                retry_after = max(self.latency, 0.05) * self.in_flight
+                raise _too_many_requests("Server is busy, retry later", retry_after)
+            self.in_flight += 1
+            self.admitted += 1
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - started
+            with self._lock:
+                self.in_flight -= 1
+                self.latency += self.smoothing * (elapsed - self.latency)
+
+    def stats(self):
+        shared = self._writer is not None
+        with self._lock:
+            return {
+                "inFlight": self.in_flight,
+                "maxConcurrent": self.max_concurrent,
+                "degradedConcurrent": self.degraded_concurrent,
+                "writeLatencyMs": round(self.latency * 1000, 2),
+                "latencyThresholdMs": self.latency_threshold * 1000,
+                # Last sampled state; stats never call out to the writer
+                "degraded": self._queued >= self.queue_threshold if shared else self.latency > self.latency_threshold,
+                "signal": "writer-queue" if shared else "latency",
+                "writerQueued": self._queued if shared else None,
+                "writerQueueThreshold": self.queue_threshold,
+                "admitted": self.admitted,
+                "shedConcurrency": self.shed_concurrency,
+                "shedLatency": self.shed_latency
+            }
+
+
+analytics_limiter = RateLimiter('analytics upload', ANALYTICS_PER_MINUTE, ANALYTICS_BURST)
+upload_url_limiter = RateLimiter('upload URL', UPLOAD_URL_PER_MINUTE, UPLOAD_URL_BURST)
+write_shedder = LoadShedder()
+
+
+def share_through(writer_client):
+    """Multi-worker mode: enforce limits and judge overload through the writer process"""
+    analytics_limiter.share_through(writer_client)
+    upload_url_limiter.share_through(writer_client)
+    write_shedder.share_through(writer_client)
+
+
+def stats():
+    """Rate limiter and load shedder decisions for the metrics endpoint"""
+    return {
+        "analyticsUpload": analytics_limiter.stats(),
+        "uploadUrl": upload_url_limiter.stats(),
+        "writes": write_shedder.stats()
+    }
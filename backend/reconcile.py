@@ -0,0 +1,121 @@
+"""
+Reconciliation of recordings stuck in 'uploading'
+A recording row is created as 'uploading' when the extension asks for an
+upload URL and only leaves that state via /api/recordings/complete. When a
+tab crashes mid-upload the row is stuck forever. This job checks each stale
+row against object storage and settles it:
+
+    object exists              -> 'uploaded' with file_size and uploaded_at (and booked in the storage ledger)
+    object missing, too old    -> 'failed'
+    object missing, recent     -> left alone (upload may still finish)
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+import ledger
+from database import execute_query, execute_transaction
+
+DEFAULT_STALE_AFTER = timedelta(hours=2)
+DEFAULT_FAIL_AFTER = timedelta(hours=24)
+DEFAULT_PAGE_SIZE = 500
+DEFAULT_MAX_WORKERS = 32
+
+
+def _sqlite_utc(moment):
+    """Format like SQLite's CURRENT_TIMESTAMP (UTC, second precision)"""
+    return moment.astimezone(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _check(storage, row):
+    """HEAD one object; returns (row, metadata or None, error or None)"""
+    key = row['storage_key'] or f"recordings/{row['id']}.webm"
+    try:
+        return row, storage.get_recording_metadata(key, raise_errors=True), None
+    except Exception as e:
+        return row, None, e
+
+
+def reconcile_stuck_uploads(storage, stale_after=DEFAULT_STALE_AFTER, fail_after=DEFAULT_FAIL_AFTER,
+                            page_size=DEFAULT_PAGE_SIZE, max_workers=DEFAULT_MAX_WORKERS, now=None):
+    """
+    Settle 'uploading' recordings older than stale_after
+
+    Rows are scanned in id order one page at a time. Each page's objects are
+    checked concurrently and its updates are written in one transaction.
+
+    Args:
+        storage: R2Storage (or anything with get_recording_metadata(key, raise_errors=True))
+        stale_after: Only rows created longer ago than this are checked
+        fail_after: Rows with no object after this long are marked 'failed'
+        page_size: Rows per page / transaction
+        max_workers: Concurrent HEAD requests
+
+    Returns:
+        dict: Counts of scanned, uploaded, failed, pending and errored rows
+    """
+    now = now or datetime.now(timezone.utc)
+    stale_cutoff = _sqlite_utc(now - stale_after)
+    fail_cutoff = _sqlite_utc(now - fail_after)
+    summary = {"scanned": 0, "uploaded": 0, "failed": 0, "pending": 0, "errors": 0, "pages": 0}
+    started = time.monotonic()
+    last_id = ''
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='reconcile') as pool:
+        while True:
+            rows = execute_query(
+                """SELECT id, meeting_id, user_id, COALESCE(storage_key, s3_key) AS storage_key, created_at
+                   FROM meeting_recordings
+                   WHERE status = 'uploading' AND created_at < ? AND id > ?
+                   ORDER BY id LIMIT ?""",
+                (stale_cutoff, last_id, page_size)
+            )
+            if not rows:
+                break
+            last_id = rows[-1]['id']
+            summary["pages"] += 1
+            summary["scanned"] += len(rows)
+
+            uploaded = []
+            stored = []
+            failed = []
+            for row, metadata, error in pool.map(lambda r: _check(storage, r), rows):
+                if error is not None:
+                    summary["errors"] += 1
+                elif metadata is not None:
+                    uploaded.append((metadata['size'], metadata['last_modified'], row['id']))
+                    stored.append((
+                        row['storage_key'] or f"recordings/{row['id']}.webm",
+                        row['id'], row['meeting_id'], row['user_id'], metadata['size']
+                    ))
+                elif row['created_at'] < fail_cutoff:
+                    failed.append((row['id'],))
+                else:
+                    summary["pending"] += 1
+
+            statements = []
+            if uploaded:
+                statements.append((
+                    """UPDATE meeting_recordings SET status = 'uploaded', file_size = ?, uploaded_at = ?
+                       WHERE id = ? AND status = 'uploading'""",
+                    uploaded,
+                    True
+                ))
+                statements.append(ledger.record_statement(stored))
+            if failed:
+                statements.append((
+                    "UPDATE meeting_recordings SET status = 'failed' WHERE id = ? AND status = 'uploading'",
+                    failed,
+                    True
+                ))
+            if statements:
+                execute_transaction(statements)
+            summary["uploaded"] += len(uploaded)
+            summary["failed"] += len(failed)
+
+            if len(rows) < page_size:
+                break
+
+    summary["seconds"] = round(time.monotonic() - started, 3)
+    return summary
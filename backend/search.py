@@ -0,0 +1,219 @@
+"""
+Full-text search over absences and meeting attendees
+Backed by SQLite FTS5 indexes (absences_fts, attendees_fts in schema.sql). The
+absence index is kept in sync by triggers on meeting_absences; attendees are
+upserted into meeting_attendees by the analytics and recording write paths.
+"""
+
+import json
+import re
+from datetime import datetime
+
+import database
+
+SEARCH_TYPES = ('absences', 'participants')
+SORT_ORDERS = ('relevance', 'recent')
+MAX_LIMIT = 100
+
+ATTENDEE_UPSERT = """INSERT INTO meeting_attendees (meeting_id, name, email, first_seen, last_seen)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT(meeting_id, name, email) DO UPDATE SET
+        first_seen = MIN(first_seen, excluded.first_seen),
+        last_seen = MAX(last_seen, excluded.last_seen)"""
+
+# Relevance weights per indexed column (bm25: lower score ranks first)
+ABSENCE_WEIGHTS = (1.0, 2.0, 4.0)   # reason, absence_type, employee_name
+ATTENDEE_WEIGHTS = (2.0, 1.0)       # name, email
+
+
+def fts_query(text):
+    """
+    Turn free text into a safe FTS5 expression
+
+    Every word becomes a quoted phrase (so punctuation in emails can't be
+    parsed as FTS5 syntax), words are ANDed, and the last word is a prefix
+    match for search-as-you-type.
+    """
+    words = [w.replace('"', '') for w in text.split()]
+    words = [w for w in words if re.search(r'\w', w)]
+    if not words:
+        raise ValueError("Search query must contain at least one word")
+    terms = [f'"{w}"' for w in words]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def _text(value):
+    """Participant field as a stripped string (clients may send numbers or nothing)"""
+    if value is None or isinstance(value, (dict, list)):
+        return ''
+    return (value if isinstance(value, str) else str(value)).strip()
+
+
+def attendee_rows(meeting_id, participants, seen_at):
+    """meeting_attendees rows for a list of participant dicts (deduplicated)"""
+    rows = {}
+    if not meeting_id or not isinstance(participants, list):
+        return []
+    for p in participants:
+        if not isinstance(p, dict):
+            continue
+        name = _text(p.get('name'))
+        email = _text(p.get('email')).lower()
+        if name or email:
+            rows[(name, email)] = (meeting_id, name, email, seen_at, seen_at)
+    return list(rows.values())
+
+
+def attendee_statement(meeting_id, participants, seen_at):
+    """
+    Upsert statement for execute_transaction, or None when there is nobody to index
+
+    Only first_seen/last_seen change on conflict, so the FTS update trigger
+    (which fires on name/email changes) stays quiet for repeat snapshots.
+    """
+    rows = attendee_rows(meeting_id, participants, seen_at)
+    return (ATTENDEE_UPSERT, rows, True) if rows else None
+
+
+def _order_by(table, sort):
+    """
+    ORDER BY clause for a search
+
+    'relevance' has to score every match, so a word found in a large share of
+    rows costs time proportional to the matches; 'recent' walks the index
+    backwards by rowid (insertion order) and stops after one page.
+    """
+    if sort not in SORT_ORDERS:
+        raise ValueError(f"sort must be one of {', '.join(SORT_ORDERS)}")
+    return "score" if sort == 'relevance' else f"{table}.rowid DESC"
+
+
+def _page(rows, limit):
+    return {"results": [dict(r) for r in rows[:limit]], "hasMore": len(rows) > limit}
+
+
+def search_absences(text, since=None, until=None, meeting_id=None, limit=20, offset=0, sort='relevance'):
+    """
+    Absences whose reason, type or employee name match
+
+    Args:
+        text: Free-text query
+        since: Inclusive lower bound on informed_at (ISO)
+        until: Exclusive upper bound on informed_at (ISO)
+        meeting_id: Restrict to one meeting
+        limit: Page size (at most MAX_LIMIT)
+        offset: Rows to skip
+        sort: 'relevance' (bm25) or 'recent' (newest first)
+
+    Returns:
+        dict: results (list of absences with score and snippet) and hasMore
+    """
+    conditions = ["absences_fts MATCH ?"]
+    params = [fts_query(text)]
+    if since:
+        conditions.append("a.informed_at >= ?")
+        params.append(since)
+    if until:
+        conditions.append("a.informed_at < ?")
+        params.append(until)
+    if meeting_id:
+        conditions.append("a.meeting_id = ?")
+        params.append(meeting_id)
+    limit = min(limit, MAX_LIMIT)
+    rows = database.execute_query(
+        f"""SELECT a.id, a.meeting_id, a.employee_id, a.employee_name, a.employee_email,
+                   a.department, a.reason, a.absence_type, a.informed_at,
+                   snippet(absences_fts, 0, '<mark>', '</mark>', '…', 16) AS snippet,
+                   bm25(absences_fts, {', '.join(map(str, ABSENCE_WEIGHTS))}) AS score
+            FROM absences_fts
+            JOIN meeting_absences a ON a.rowid = absences_fts.rowid
+            WHERE {' AND '.join(conditions)}
+            ORDER BY {_order_by('absences_fts', sort)}
+            LIMIT ? OFFSET ?""",
+        (*params, limit + 1, offset)
+    )
+    return _page(rows, limit)
+
+
+def search_participants(text, since=None, until=None, meeting_id=None, limit=20, offset=0, sort='relevance'):
+    """
+    Meetings attended by people whose name or email match
+
+    since/until bound the attendee's last_seen in the meeting (ISO).
+    """
+    conditions = ["attendees_fts MATCH ?"]
+    params = [fts_query(text)]
+    if since:
+        conditions.append("m.last_seen >= ?")
+        params.append(since)
+    if until:
+        conditions.append("m.first_seen < ?")
+        params.append(until)
+    if meeting_id:
+        conditions.append("m.meeting_id = ?")
+        params.append(meeting_id)
+    limit = min(limit, MAX_LIMIT)
+    rows = database.execute_query(
+        f"""SELECT m.meeting_id, m.name, m.email, m.first_seen, m.last_seen,
+                   bm25(attendees_fts, {', '.join(map(str, ATTENDEE_WEIGHTS))}) AS score
+            FROM attendees_fts
+            JOIN meeting_attendees m ON m.id = attendees_fts.rowid
+            WHERE {' AND '.join(conditions)}
+            ORDER BY {_order_by('attendees_fts', sort)}
+            LIMIT ? OFFSET ?""",
+        (*params, limit + 1, offset)
+    )
+    return _page(rows, limit)
+
+
+def rebuild_index(chunk_size=5000):
+    """
+    Rebuild both search indexes from their sources
+
+    meeting_attendees is recomputed from every readable analytics partition
+    and from meeting_participants; both FTS indexes are then rebuilt from
+    their content tables and optimized.
+
+    Returns:
+        dict: Number of absences and attendees indexed
+    """
+    attendees = {}
+
+    def add(rows):
+        for meeting_id, name, email, seen, _ in rows:
+            key = (meeting_id, name, email)
+            known = attendees.get(key)
+            if known is None:
+                attendees[key] = [seen, seen]
+            else:
+                known[0] = min(known[0], seen)
+                known[1] = max(known[1], seen)
+
+    for row in database.iter_analytics(newest_first=False, chunk_size=chunk_size):
+        try:
+            participants = json.loads(row['data']).get('participants')
+        except (ValueError, AttributeError):
+            continue
+        add(attendee_rows(row['meeting_id'], participants, row['timestamp']))
+
+    for row in database.execute_query(
+        "SELECT meeting_id, employee_name, employee_email, join_time FROM meeting_participants"
+    ):
+        participant = {'name': row['employee_name'], 'email': row['employee_email']}
+        add(attendee_rows(row['meeting_id'], [participant], row['join_time'] or datetime.now().isoformat()))
+
+    database.execute_transaction([
+        ("DELETE FROM meeting_attendees", None, False),
+        (
+            "INSERT INTO meeting_attendees (meeting_id, name, email, first_seen, last_seen) VALUES (?, ?, ?, ?, ?)",
+            [(*key, seen[0], seen[1]) for key, seen in attendees.items()],
+            True
+        ),
+        ("INSERT INTO attendees_fts (attendees_fts) VALUES ('rebuild')", None, False),
+        ("INSERT INTO attendees_fts (attendees_fts) VALUES ('optimize')", None, False),
+        ("INSERT INTO absences_fts (absences_fts) VALUES ('rebuild')", None, False),
+        ("INSERT INTO absences_fts (absences_fts) VALUES ('optimize')", None, False),
+    ])
+    absences = database.execute_query("SELECT COUNT(*) AS n FROM meeting_absences")[0]['n']
+    return {"absences": absences, "attendees": len(attendees)}
@@ -1,21 +1,59 @@
 """
 Startup script for Laneway Backend API
 Initializes database and starts the server
+
+Usage:
+    python start.py                 # single process (development)
+    python start.py --workers 4     # 4 uvicorn workers + one SQLite writer process
 """
 
+import argparse
 import os
+import secrets
+import socket
 import sys
 
 # Add backend directory to path
 sys.path.insert(0, os.path.dirname(__file__))
 
-from database import init_database
+from database import init_database, DB_PATH
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Laneway Backend API")
+    parser.add_argument('--host', default=os.getenv('LANEWAY_HOST', '0.0.0.0'))
+    parser.add_argument('--port', type=int, default=int(os.getenv('LANEWAY_PORT', '5000')))
+    parser.add_argument(
+        '--workers', type=int, default=int(os.getenv('LANEWAY_WORKERS', '1')),
+        help="Number of uvicorn worker processes; >1 routes all writes through a single writer process"
+    )
+    parser.add_argument(
+        '--writer-batch-size', type=int, default=int(os.getenv('LANEWAY_WRITER_BATCH_SIZE', '256')),
+        help="Maximum write requests committed in one transaction by the writer"
+    )
+    return parser.parse_args()
+
+def bind_socket(host, port):
+    """
+    Bind the shared listening socket for multi-worker mode
+
+    uvicorn's own bind creates the socket with proto=0, so asyncio never turns on
+    TCP_NODELAY for accepted connections and every small response stalls ~40 ms on
+    Nagle + delayed ACK. Creating it with IPPROTO_TCP avoids that.
+    """
+    family = socket.AF_INET6 if ':' in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM, socket.IPPROTO_TCP)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.set_inheritable(True)
+    return sock
 
 def main():
+    args = parse_args()
+
     print("=" * 60)
     print("🚀 Laneway Backend API - Starting Up")
     print("=" * 60)
-    
+
     # Initialize database
     print("\n📦 Initializing database...")
     try:
@@ -24,23 +62,49 @@ def main():
     except Exception as e:
         print(f"❌ Database initialization failed: {e}")
         return
-    
+
+    # Start the single-writer coordinator before any worker imports the app
+    if args.workers > 1:
+        import writer
+
+        print(f"\n✍️  Starting SQLite writer process for {args.workers} workers...")
+        authkey = secrets.token_bytes(32)
+        try:
+            writer_process, address = writer.start_writer_process(
+                DB_PATH, authkey, batch_size=args.writer_batch_size
+            )
+        except writer.WriterError as e:
+            print(f"❌ {e}")
+            return
+        os.environ[writer.ADDRESS_ENV] = writer.format_address(address)
+        os.environ[writer.AUTHKEY_ENV] = authkey.hex()
+        print(f"✅ Writer process {writer_process.pid} listening on {writer.format_address(address)}")
+
     # Start the server
     print("\n🌐 Starting API server...")
-    print("📍 Server URL: http://localhost:5000")
-    print("📚 API Docs: http://localhost:5000/docs")
+    print(f"📍 Server URL: http://localhost:{args.port}")
+    print(f"📚 API Docs: http://localhost:{args.port}/docs")
+    print(f"⚙️  Workers: {args.workers}")
     print("\n💡 Demo credentials:")
     print("   Email: demo@laneway.com")
     print("   Password: demo123")
     print("\n" + "=" * 60)
     print("Press Ctrl+C to stop the server")
     print("=" * 60 + "\n")
-    
+
     # Import and run
     import uvicorn
-    from main import app
-    
-    uvicorn.run(app, host="0.0.0.0", port=5000, log_level="info")
+
+    if args.workers > 1:
+        from uvicorn.supervisors import Multiprocess
+
+        # Workers are separate processes, so uvicorn needs the app as an import string
+        config = uvicorn.Config("main:app", host=args.host, port=args.port, workers=args.workers, log_level="info")
+        server = uvicorn.Server(config)
+        Multiprocess(config, target=server.run, sockets=[bind_socket(args.host, args.port)]).run()
+    else:
+        from main import app
+        uvicorn.run(app, host=args.host, port=args.port, log_level="info")
 
 if __name__ == "__main__":
     main()
@@ -5,26 +5,61 @@ Handles upload/download of meeting recordings
 
 import boto3
 from botocore.client import Config
+from botocore.exceptions import ClientError
 import os
-from datetime import datetime, timedelta
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
 from dotenv import load_dotenv
 
+from storage.sigv4 import SigV4Presigner
+
 load_dotenv()
 
 class R2Storage:
     """Cloudflare R2 storage client"""
     
-    def __init__(self):
-        """Initialize R2 client"""
+    def __init__(self, endpoint_url=None, access_key_id=None, secret_access_key=None,
+                 bucket_name=None, max_pool_connections=None):
+        """
+        Initialize R2 client
+        
+        Arguments default to the R2_* environment variables; pass them explicitly
+        to point at another S3-compatible endpoint (e.g. a local MinIO for tests).
+        """
+        pool_size = max_pool_connections or int(os.getenv('R2_MAX_POOL_CONNECTIONS', '50'))
+        endpoint_url = endpoint_url or os.getenv('R2_ENDPOINT')
+        access_key_id = access_key_id or os.getenv('R2_ACCESS_KEY_ID')
+        secret_access_key = secret_access_key or os.getenv('R2_SECRET_ACCESS_KEY')
         self.client = boto3.client(
             's3',
-            endpoint_url=os.getenv('R2_ENDPOINT'),
-            aws_access_key_id=os.getenv('R2_ACCESS_KEY_ID'),
-            aws_secret_access_key=os.getenv('R2_SECRET_ACCESS_KEY'),
-            config=Config(signature_version='s3v4'),
+            endpoint_url=endpoint_url,
+            aws_access_key_id=access_key_id,
+            aws_secret_access_key=secret_access_key,
+            # Sized for concurrent HEADs from the reconciliation job
+            config=Config(signature_version='s3v4', max_pool_connections=pool_size),
             region_name='auto'
         )
-        self.bucket_name = os.getenv('R2_BUCKET_NAME', 'laneway-recordings')
+        self.bucket_name = bucket_name or os.getenv('R2_BUCKET_NAME', 'laneway-recordings')
+
+        # Presigned URLs are signed locally instead of through boto3's request pipeline
+        try:
+            self.presigner = SigV4Presigner(endpoint_url, access_key_id, secret_access_key, region='auto')
+        except ValueError as e:
+            print(f"⚠️  R2 presigning disabled: {e}")
+            self.presigner = None
+
+        # Download URLs are reused until shortly before they expire
+        self.url_refresh_margin = int(os.getenv('R2_URL_REFRESH_MARGIN', '300'))
+        self.url_cache_max_entries = int(os.getenv('R2_URL_CACHE_MAX_ENTRIES', '10000'))
+        self._download_urls = OrderedDict()
+        self._download_urls_lock = threading.Lock()
+
+    def _presign(self, method, key, expires_in, headers=None):
+        if self.presigner is None:
+            raise ValueError("R2 credentials are not configured")
+        return self.presigner.presign(method, self.bucket_name, key, expires_in, headers)
     
     def generate_upload_url(self, recording_id, expires_in=3600):
         """
@@ -40,16 +75,7 @@ class R2Storage:
         key = f"recordings/{recording_id}.webm"
         
         try:
-            url = self.client.generate_presigned_url(
-                'put_object',
-                Params={
-                    'Bucket': self.bucket_name,
-                    'Key': key,
-                    'ContentType': 'video/webm'
-                },
-                ExpiresIn=expires_in
-            )
-            
+            url = self._presign('PUT', key, expires_in, {'Content-Type': 'video/webm'})
             return url, key
         except Exception as e:
             print(f"Error generating upload URL: {e}")
@@ -60,6 +86,10 @@ class R2Storage:
         """
         Generate presigned URL for downloading a recording
         
+        A URL issued earlier for the same key is returned again until it is
+        within R2_URL_REFRESH_MARGIN seconds (or half its lifetime, if shorter)
+        of expiring, so repeated listings don't re-sign every object.
+        
         Args:
             key: Storage key of the recording
             expires_in: URL expiration time in seconds
@@ -67,20 +97,30 @@ class R2Storage:
         Returns:
             str: Download URL
         """
+        now = time.time()
+        with self._download_urls_lock:
+            cached = self._download_urls.get(key)
+            if cached and cached[2] == expires_in and now < cached[1]:
+                self._download_urls.move_to_end(key)
+                return cached[0]
+
         try:
-            url = self.client.generate_presigned_url(
-                'get_object',
-                Params={
-                    'Bucket': self.bucket_name,
-                    'Key': key
-                },
-                ExpiresIn=expires_in
-            )
-            
-            return url
+            url = self._presign('GET', key, expires_in)
         except Exception as e:
             print(f"Error generating download URL: {e}")
             return None
+
+        reuse_until = now + expires_in - min(self.url_refresh_margin, expires_in / 2)
+        with self._download_urls_lock:
+            self._download_urls[key] = (url, reuse_until, expires_in)
+            self._download_urls.move_to_end(key)
+            while len(self._download_urls) > self.url_cache_max_entries:
+                self._download_urls.popitem(last=False)
+        return url
+
+    def _forget_download_url(self, key):
+        with self._download_urls_lock:
+            self._download_urls.pop(key, None)
     
     def list_recordings(self, prefix='recordings/', max_keys=1000):
         """
@@ -115,6 +155,34 @@ class R2Storage:
             print(f"Error listing recordings: {e}")
             return []
     
+    def iter_objects(self, prefix='recordings/', page_size=1000):
+        """
+        Yield every object under prefix, following list pagination
+        
+        Unlike list_recordings this signs no download URLs and is not capped
+        at one page, so it is what size accounting and retention use.
+        
+        Args:
+            prefix: Key prefix to list
+            page_size: Keys requested per list call (S3 maximum is 1000)
+            
+        Yields:
+            dict: key, size and last_modified (datetime)
+        """
+        paginator = self.client.get_paginator('list_objects_v2')
+        pages = paginator.paginate(
+            Bucket=self.bucket_name,
+            Prefix=prefix,
+            PaginationConfig={'PageSize': page_size}
+        )
+        for page in pages:
+            for obj in page.get('Contents', []):
+                yield {
+                    'key': obj['Key'],
+                    'size': obj['Size'],
+                    'last_modified': obj['LastModified']
+                }
+    
     def delete_recording(self, key):
         """
         Delete a recording from storage
@@ -130,6 +198,7 @@ class R2Storage:
                 Bucket=self.bucket_name,
                 Key=key
             )
+            self._forget_download_url(key)
             print(f"✅ Deleted: {key}")
             return True
         except Exception as e:
@@ -146,41 +215,45 @@ class R2Storage:
         Returns:
             dict: Summary of deletion operation
         """
-        cutoff_date = datetime.now() - timedelta(days=days)
-        recordings = self.list_recordings()
+        cutoff_date = datetime.now(timezone.utc) - timedelta(days=days)
         
         deleted = []
+        deleted_keys = []
         failed = []
         total_size_freed = 0
         
-        for recording in recordings:
-            last_modified = datetime.fromisoformat(recording['last_modified'].replace('Z', '+00:00'))
-            last_modified = last_modified.replace(tzinfo=None)
-            
-            if last_modified < cutoff_date:
-                if self.delete_recording(recording['key']):
-                    deleted.append(recording['name'])
-                    total_size_freed += recording['size']
-                else:
-                    failed.append(recording['name'])
+        # Collect first so deleting doesn't shift the listing being paged through
+        expired = [obj for obj in self.iter_objects() if obj['last_modified'] < cutoff_date]
+        for obj in expired:
+            name = obj['key'].split('/')[-1]
+            if self.delete_recording(obj['key']):
+                deleted.append(name)
+                deleted_keys.append(obj['key'])
+                total_size_freed += obj['size']
+            else:
+                failed.append(name)
         
         return {
             'deleted_count': len(deleted),
             'failed_count': len(failed),
             'size_freed': total_size_freed,
             'deleted_files': deleted,
+            'deleted_keys': deleted_keys,
             'failed_files': failed
         }
     
-    def get_recording_metadata(self, key):
+    def get_recording_metadata(self, key, raise_errors=False):
         """
         Get metadata for a recording
         
         Args:
             key: Storage key of the recording
+            raise_errors: Re-raise errors other than "not found" instead of
+                returning None, so callers can tell a missing object from a
+                failed request
             
         Returns:
-            dict: Recording metadata
+            dict: Recording metadata, or None if the object does not exist
         """
         try:
             response = self.client.head_object(
@@ -191,19 +264,29 @@ class R2Storage:
             return {
                 'size': response['ContentLength'],
                 'last_modified': response['LastModified'].isoformat(),
-                'content_type': response['ContentType']
+                'content_type': response.get('ContentType')
             }
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return None
+            if raise_errors:
+                raise
+            print(f"Error getting metadata: {e}")
+            return None
         except Exception as e:
+            if raise_errors:
+                raise
             print(f"Error getting metadata: {e}")
             return None
     
     def get_bucket_size(self):
         """
-        Calculate total size of all recordings in bucket
+        Calculate total size of all recordings in bucket by listing it
+        
+        This walks the whole bucket; for routine usage reads use the storage
+        ledger (ledger.usage), which answers from one SQLite row.
         
         Returns:
             int: Total size in bytes
         """
-        recordings = self.list_recordings()
-        total_size = sum(r['size'] for r in recordings)
-        return total_size
+        return sum(obj['size'] for obj in self.iter_objects())
@@ -0,0 +1,108 @@
+"""
+Lightweight AWS Signature Version 4 query-string presigner
+Produces the same presigned URLs as boto3's generate_presigned_url for a
+path-style S3-compatible endpoint (such as R2), without building a boto3
+request model per URL. The derived signing key only changes once per day and
+region, so it is computed once and reused.
+"""
+
+import hashlib
+import hmac
+from datetime import datetime, timezone
+from urllib.parse import quote, urlsplit
+
+ALGORITHM = 'AWS4-HMAC-SHA256'
+UNSIGNED_PAYLOAD = 'UNSIGNED-PAYLOAD'
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+# Longest expiry SigV4 allows for a presigned URL (7 days)
+MAX_EXPIRES_IN = 7 * 24 * 3600
+
+
+def _hmac(key, message):
+    return hmac.new(key, message.encode('utf-8'), hashlib.sha256).digest()
+
+
+def _quote(value):
+    """RFC 3986 encoding as SigV4 expects it (only unreserved characters left as is)"""
+    return quote(value, safe='-_.~')
+
+
+class SigV4Presigner:
+    """Presigns S3 requests for one endpoint and set of credentials"""
+
+    def __init__(self, endpoint_url, access_key_id, secret_access_key, region='auto', service='s3'):
+        if not endpoint_url or not access_key_id or not secret_access_key:
+            raise ValueError("Endpoint URL, access key ID and secret access key are required to presign URLs")
+        parts = urlsplit(endpoint_url)
+        self.scheme = parts.scheme
+        # Like botocore, the Host header keeps the port only when it isn't the scheme's default
+        self.host = parts.hostname
+        if parts.port and parts.port != DEFAULT_PORTS.get(parts.scheme):
+            self.host = f"{parts.hostname}:{parts.port}"
+        self.base_path = parts.path.rstrip('/')
+        self.access_key_id = access_key_id
+        self.secret_access_key = secret_access_key
+        self.region = region
+        self.service = service
+        # (datestamp, key); replaced as a whole so concurrent signers never see a mismatched pair
+        self._signing_key = (None, None)
+
+    def signing_key(self, datestamp):
+        """Derived key for a YYYYMMDD date, computed once per day"""
+        cached_date, key = self._signing_key
+        if cached_date == datestamp:
+            return key
+        key = _hmac(('AWS4' + self.secret_access_key).encode('utf-8'), datestamp)
+        key = _hmac(key, self.region)
+        key = _hmac(key, self.service)
+        key = _hmac(key, 'aws4_request')
+        self._signing_key = (datestamp, key)
+        return key
+
+    def presign(self, method, bucket, key, expires_in=3600, headers=None, now=None):
+        """
+        Build a presigned URL
+
+        Args:
+            method: HTTP method the URL is for ('GET', 'PUT', ...)
+            bucket: Bucket name
+            key: Object key
+            expires_in: Validity in seconds (at most 7 days)
+            headers: Extra headers the client must send, e.g. {'Content-Type': 'video/webm'}
+            now: Signing time (defaults to the current UTC time)
+
+        Returns:
+            str: Presigned URL
+        """
+        if not 1 <= expires_in <= MAX_EXPIRES_IN:
+            raise ValueError(f"expires_in must be between 1 and {MAX_EXPIRES_IN} seconds")
+        now = now or datetime.now(timezone.utc)
+        amz_date = now.strftime('%Y%m%dT%H%M%SZ')
+        datestamp = amz_date[:8]
+        scope = f"{datestamp}/{self.region}/{self.service}/aws4_request"
+
+        signed = {'host': self.host}
+        for name, value in (headers or {}).items():
+            signed[name.lower()] = ' '.join(str(value).split())
+        signed_names = ';'.join(sorted(signed))
+
+        path = f"{self.base_path}/{quote(bucket, safe='')}/{quote(key, safe='/~')}"
+        query = '&'.join(f"{name}={_quote(value)}" for name, value in sorted((
+            ('X-Amz-Algorithm', ALGORITHM),
+            ('X-Amz-Credential', f"{self.access_key_id}/{scope}"),
+            ('X-Amz-Date', amz_date),
+            ('X-Amz-Expires', str(int(expires_in))),
+            ('X-Amz-SignedHeaders', signed_names),
+        )))
+        canonical_headers = ''.join(f"{name}:{signed[name]}\n" for name in sorted(signed))
+        canonical_request = '\n'.join((
+            method.upper(), path, query, canonical_headers, signed_names, UNSIGNED_PAYLOAD
+        ))
+        string_to_sign = '\n'.join((
+            ALGORITHM, amz_date, scope, hashlib.sha256(canonical_request.encode('utf-8')).hexdigest()
+        ))
+        signature = hmac.new(
+            self.signing_key(datestamp), string_to_sign.encode('utf-8'), hashlib.sha256
+        ).hexdigest()
+        return f"{self.scheme}://{self.host}{path}?{query}&X-Amz-Signature={signature}"
@@ -0,0 +1,385 @@
+"""
+Single-writer SQLite coordinator
+In multi-worker mode every uvicorn worker forwards its writes to one writer
+process over a local socket, so SQLite sees exactly one writer and concurrent
+writes are committed together in batched transactions.
+
+The writer also relays response-cache invalidations between workers.
+"""
+
+import builtins
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import deque
+from multiprocessing.connection import Listener, Client
+
+from ratelimit import RateLimiter
+
+# Environment variables used to hand the writer address to uvicorn workers
+ADDRESS_ENV = 'LANEWAY_WRITER_ADDRESS'
+AUTHKEY_ENV = 'LANEWAY_WRITER_AUTHKEY'
+
+# Upper bound on write requests folded into one transaction
+DEFAULT_BATCH_SIZE = 256
+
+# SQLite's default limit on attached databases (Connection.getlimit needs Python 3.11)
+SQLITE_MAX_ATTACHED = 10
+
+# Attach slots left unused per transaction
+ATTACH_MARGIN = 2
+
+# Cache invalidations kept for workers that poll late
+INVALIDATION_LOG_SIZE = 10000
+
+
+class WriterError(Exception):
+    """Raised when the writer process cannot be reached"""
+
+
+class WriterServer:
+    """Owns the only write connection to the database"""
+
+    def __init__(self, db_path, address=('127.0.0.1', 0), authkey=None, batch_size=DEFAULT_BATCH_SIZE):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.listener = Listener(address, authkey=authkey)
+        self.address = self.listener.address
+        self._requests = queue.Queue()
+        self._invalidations = deque(maxlen=INVALIDATION_LOG_SIZE)
+        self._invalidation_seq = 0
+        self._invalidation_lock = threading.Lock()
+        self.transactions = 0
+        self.writes = 0
+        # Token buckets shared by all workers, by limiter name
+        self._limiters = {}
+        self._limiters_lock = threading.Lock()
+
+    def serve_forever(self):
+        """Run the writer loop and accept worker connections until the process exits"""
+        threading.Thread(target=self._write_loop, name='sqlite-writer', daemon=True).start()
+        while True:
+            try:
+                conn = self.listener.accept()
+            except (OSError, EOFError):
+                continue
+            threading.Thread(target=self._handle_connection, args=(conn,), daemon=True).start()
+
+    def _handle_connection(self, conn):
+        """Serve one worker connection; requests on a connection are handled in order"""
+        try:
+            while True:
+                message = conn.recv()
+                kind = message[0]
+                if kind == 'write':
+                    done = threading.Event()
+                    slot = {}
+                    self._requests.put((message[1], message[2], slot, done))
+                    done.wait()
+                    conn.send(slot.get('reply', ('error', 'DatabaseError', 'Write was not processed')))
+                elif kind == 'invalidate':
+                    conn.send(('ok', self._publish(message[1])))
+                elif kind == 'poll':
+                    conn.send(('ok', self._poll(message[1])))
+                elif kind == 'stats':
+                    conn.send(('ok', {"transactions": self.transactions, "writes": self.writes,
+                                      "queued": self._requests.qsize()}))
+                elif kind == 'queued':
+                    conn.send(('ok', self._requests.qsize()))
+                elif kind == 'rate_limit':
+                    try:
+                        conn.send(('ok', self._limiter(*message[1:4]).acquire(message[4])))
+                    except Exception as e:
+                        conn.send(_error_reply(e))
+                elif kind == 'rate_limit_stats':
+                    limiter = self._limiters.get(message[1])
+                    conn.send(('ok', limiter.stats() if limiter is not None else None))
+                else:
+                    conn.send(('error', 'ValueError', f'Unknown request {kind!r}'))
+        except (EOFError, OSError):
+            pass
+        finally:
+            conn.close()
+
+    def _write_loop(self):
+        """Drain queued write requests and commit them in batches"""
+        db = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False)
+        db.execute('PRAGMA journal_mode=WAL')
+        db.execute('PRAGMA synchronous=NORMAL')
+        # SQLite refuses ATTACH past its limit, so batches are split to stay below it
+        limit = db.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED) if hasattr(db, 'getlimit') else SQLITE_MAX_ATTACHED
+        self.max_attached = max(1, limit - ATTACH_MARGIN)
+
+        while True:
+            batch = [self._requests.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._requests.get_nowait())
+                except queue.Empty:
+                    break
+
+            for group in _split_by_attachments(batch, self.max_attached):
+                self._commit(db, group)
+
+    def _commit(self, db, batch):
+        """Run a group of write requests in one transaction and reply to each of them"""
+        attached = []
+        try:
+            attached = _attach(db, batch)
+            db.execute('BEGIN IMMEDIATE')
+            for statements, _, slot, _ in batch:
+                # A savepoint per request keeps one bad write from failing the batch
+                db.execute('SAVEPOINT request')
+                try:
+                    slot['reply'] = ('ok', run_statements(db, statements))
+                    db.execute('RELEASE request')
+                except Exception as e:
+                    # Not just sqlite3.Error: e.g. an int too large for SQLite raises OverflowError
+                    db.execute('ROLLBACK TO request')
+                    db.execute('RELEASE request')
+                    slot['reply'] = _error_reply(e)
+            db.execute('COMMIT')
+            self.transactions += 1
+            self.writes += len(batch)
+        except Exception as e:
+            # Whatever failed, the loop has to survive and every waiting worker needs a reply
+            try:
+                if db.in_transaction:
+                    db.execute('ROLLBACK')
+            except sqlite3.Error:
+                pass
+            for _, _, slot, _ in batch:
+                slot['reply'] = _error_reply(e)
+        finally:
+            for alias in attached:
+                try:
+                    db.execute(f'DETACH DATABASE {alias}')
+                except sqlite3.Error:
+                    pass
+            for _, _, _, done in batch:
+                done.set()
+
+    def _limiter(self, name, per_minute, burst):
+        """Shared token buckets for a limiter, created on first use with the worker's settings"""
+        with self._limiters_lock:
+            limiter = self._limiters.get(name)
+            if limiter is None:
+                limiter = self._limiters[name] = RateLimiter(name, per_minute, burst)
+            return limiter
+
+    def _publish(self, tags):
+        with self._invalidation_lock:
+            self._invalidation_seq += 1
+            self._invalidations.append((self._invalidation_seq, tuple(tags)))
+            return self._invalidation_seq
+
+    def _poll(self, since):
+        """Return (latest_seq, tags) published after since, or (latest_seq, None) if the log was truncated"""
+        with self._invalidation_lock:
+            seq = self._invalidation_seq
+            if since >= seq:
+                return seq, []
+            if not self._invalidations or self._invalidations[0][0] > since + 1:
+                return seq, None
+            tags = []
+            for entry_seq, entry_tags in self._invalidations:
+                if entry_seq > since:
+                    tags.extend(entry_tags)
+            return seq, tags
+
+
+def _error_reply(error):
+    return ('error', type(error).__name__, str(error))
+
+
+def _split_by_attachments(batch, limit):
+    """
+    Split a batch into consecutive groups that each attach at most limit files
+
+    Requests keep their order; a request that needs more files than the limit
+    on its own still gets a group of its own (and fails alone).
+    """
+    group, aliases = [], set()
+    for request in batch:
+        needed = set(request[1] or ())
+        if group and len(aliases | needed) > limit:
+            yield group
+            group, aliases = [], set()
+        group.append(request)
+        aliases |= needed
+    if group:
+        yield group
+
+
+def _attach(db, batch):
+    """
+    Attach the extra database files a batch needs (ATTACH can't run inside a transaction)
+
+    Files are detached again after the batch so partitions that get sealed,
+    archived or dropped by maintenance are never held open.
+    """
+    needed = {}
+    for _, attach, _, _ in batch:
+        needed.update(attach or {})
+    attached = []
+    try:
+        for alias, path in needed.items():
+            db.execute(f'ATTACH DATABASE ? AS {alias}', (path,))
+            attached.append(alias)
+    except sqlite3.Error:
+        for alias in attached:
+            db.execute(f'DETACH DATABASE {alias}')
+        raise
+    return attached
+
+
+def run_statements(db, statements):
+    """Execute (query, params, many) tuples; returns [(lastrowid, rowcount), ...]"""
+    results = []
+    for query, params, many in statements:
+        if many:
+            cursor = db.executemany(query, params)
+        else:
+            cursor = db.execute(query, params or ())
+        results.append((cursor.lastrowid, cursor.rowcount))
+    return results
+
+
+class WriterClient:
+    """Worker-side handle to the writer process (one socket per thread)"""
+
+    def __init__(self, address, authkey):
+        self.address = address
+        self.authkey = authkey
+        self._local = threading.local()
+
+    def execute(self, statements, attach=None):
+        """
+        Run statements in one transaction on the writer
+
+        Args:
+            statements: List of (query, params, many) tuples
+            attach: Optional {alias: path} of database files to attach first
+
+        Returns:
+            list: (lastrowid, rowcount) per statement
+        """
+        return self._request(('write', list(statements), attach))
+
+    def publish_invalidation(self, tags):
+        """Broadcast response-cache invalidation tags to the other workers"""
+        return self._request(('invalidate', tuple(tags)))
+
+    def poll_invalidations(self, since):
+        """Fetch tags invalidated by other workers after sequence number since"""
+        return self._request(('poll', since))
+
+    def stats(self):
+        return self._request(('stats',))
+
+    def queue_depth(self):
+        """Write requests waiting for the writer"""
+        return self._request(('queued',))
+
+    def rate_limit(self, name, per_minute, burst, key):
+        """Take a token from the writer's shared bucket; returns seconds to wait (0 if allowed)"""
+        return self._request(('rate_limit', name, per_minute, burst, key))
+
+    def rate_limit_stats(self, name):
+        """Shared limiter stats, or None before the limiter's first decision"""
+        return self._request(('rate_limit_stats', name))
+
+    def _request(self, message):
+        # Only a failed send is retried on a fresh connection: once the message has
+        # been sent the writer may have applied it, so a failed recv is not resent
+        for attempt in range(2):
+            conn = self._connection()
+            try:
+                conn.send(message)
+                break
+            except (EOFError, OSError) as e:
+                self._local.conn = None
+                if attempt:
+                    raise WriterError(f"Writer unavailable: {e}")
+        try:
+            reply = conn.recv()
+        except (EOFError, OSError) as e:
+            self._local.conn = None
+            raise WriterError(f"Writer connection lost before replying: {e}")
+        if reply[0] == 'ok':
+            return reply[1]
+        _, name, detail = reply
+        error = getattr(sqlite3, name, None) or getattr(builtins, name, None)
+        if not (isinstance(error, type) and issubclass(error, Exception)):
+            error = sqlite3.DatabaseError
+        raise error(detail)
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            try:
+                conn = Client(self.address, authkey=self.authkey)
+            except OSError as e:
+                raise WriterError(f"Writer unavailable at {self.address}: {e}")
+            self._local.conn = conn
+        return conn
+
+
+def format_address(address):
+    """Address as an environment-friendly string ("host:port" or a socket path)"""
+    if isinstance(address, tuple):
+        return f"{address[0]}:{address[1]}"
+    return address
+
+
+def parse_address(value):
+    """Inverse of format_address"""
+    host, sep, port = value.rpartition(':')
+    if sep and port.isdigit() and os.sep not in value:
+        return (host, int(port))
+    return value
+
+
+def client_from_env():
+    """Build a WriterClient from the environment, or None when running single-process"""
+    address = os.getenv(ADDRESS_ENV)
+    if not address:
+        return None
+    authkey = bytes.fromhex(os.getenv(AUTHKEY_ENV, ''))
+    return WriterClient(parse_address(address), authkey)
+
+
+def _serve(db_path, authkey, ready, batch_size):
+    server = WriterServer(db_path, authkey=authkey, batch_size=batch_size)
+    ready.send(server.address)
+    ready.close()
+    server.serve_forever()
+
+
+def start_writer_process(db_path, authkey, batch_size=DEFAULT_BATCH_SIZE, timeout=10):
+    """
+    Start the writer in a child process
+
+    Returns:
+        tuple: (process, address) once the writer is accepting connections
+    """
+    import multiprocessing
+
+    parent_end, child_end = multiprocessing.Pipe(duplex=False)
+    process = multiprocessing.Process(
+        target=_serve,
+        args=(db_path, authkey, child_end, batch_size),
+        name='laneway-writer',
+        daemon=True
+    )
+    process.start()
+    child_end.close()
+
+    deadline = time.monotonic() + timeout
+    while not parent_end.poll(0.1):
+        if not process.is_alive() or time.monotonic() > deadline:
+            process.terminate()
+            raise WriterError("Writer process failed to start")
+    return process, parent_end.recv()